@@ -0,0 +1,71 @@
+"""
+Memory used by the reactive objects of atak.
+
+Measures the bytes allocated per plain Writeable, per namespace binding
+(a variable, a Writeable bound to it and a subscriber) and per child
+Namespace, using tracemalloc.
+
+    python benchmarks/memory.py [-n COUNT]
+
+Bytes per object with -n 10000 under Python 3.11. "before" was measured
+on the tree preceding the slotted reactive classes, by running this
+script against a checkout of that tree's src directory:
+
+              before   slotted
+    value        864       136
+    binding     3672      2560
+    namespace   1388       876
+"""
+import argparse
+import gc
+import tracemalloc
+
+from atak.writeable import Namespace, Writeable
+
+
+def measure(create, count: int) -> float:
+    """Return the bytes allocated per object made by `create`."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [create(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def value(i: int):
+    """Create a Writeable holding a value."""
+    return Writeable(i)
+
+
+def binding(i: int):
+    """Bind a Writeable to a namespace variable and subscribe to it."""
+    namespace = Namespace()
+    namespace["value"] = i
+    writeable = Writeable.from_name(namespace, "value")
+    writeable.subscribe(print)
+    writeable.get()
+    return namespace, writeable
+
+
+def namespace(i: int, parent=Namespace()):
+    """Create a child namespace with a variable."""
+    child = Namespace([parent])
+    child["value"] = i
+    return child
+
+
+def main():
+    """Run the measures and print them."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    args = parser.parse_args()
+    for create in (value, binding, namespace):
+        size = measure(create, args.count)
+        print(f"{create.__name__:<10} {size:8.1f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Save and load speed of the Store serializers.
+
+Measures the best save and load time, and the file size, of a Store of
+COUNT user records with each serializer of `atak.store.SERIALIZERS`,
+including orjson and ujson when installed.
+
+    python benchmarks/serializers.py [-s COUNT ...] [-r REPEAT]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from atak.store import SERIALIZERS, Store
+
+
+def records(count: int) -> dict:
+    """Return `count` user records, like an app settings store."""
+    return {
+        f"user{i}": {
+            "name": f"User number {i}",
+            "theme": "dark" if i % 3 else "light",
+            "score": i / 7,
+            "active": i % 2 == 0,
+            "todos": [f"todo {j}" for j in range(i % 4)],
+        }
+        for i in range(count)
+    }
+
+
+def best(function, repeat: int) -> float:
+    """Return the shortest time of `repeat` calls to `function`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def measure(name: str, data: dict, repeat: int) -> tuple[float, float, int]:
+    """Return the save and load seconds, and file bytes with `name`."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store")
+        store = Store(path, data, serializer=name)
+        save = best(store.save, repeat)
+        load = best(lambda: Store(path, serializer=name), repeat)
+        return save, load, os.path.getsize(path)
+
+
+def main():
+    """Run the measures and print them."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000, 1000000],
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(
+        f"{'entries':>8} {'serializer':<10} {'save ms':>9} {'load ms':>9} "
+        f"{'KiB':>10}"
+    )
+    for count in args.sizes:
+        data = records(count)
+        for name in SERIALIZERS:
+            save, load, size = measure(name, data, args.repeat)
+            print(
+                f"{count:>8} {name:<10} {save * 1000:>9.2f} "
+                f"{load * 1000:>9.2f} {size / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Taktk asyncio integration.
+
+Runs an asyncio event loop on a background thread alongside the tk
+mainloop. Coroutines are started with `spawn`, from component callbacks
+or anywhere else. Writeables they set are handed to the UI thread by
+`uithread`, and `on_ui` runs any other code there. If the app was not
+started with `mainloop`, the first `spawn` from the main thread installs
+the UI channel on the default tk root.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import tkinter
+from logging import getLogger
+from typing import Any, Callable, Coroutine, Optional
+
+from .uithread import UI
+
+log = getLogger(__name__)
+
+
+class AsyncLoop:
+    """An asyncio event loop running in it's own thread."""
+
+    loop: Optional[asyncio.AbstractEventLoop]
+    thread: Optional[threading.Thread]
+
+    def __init__(self):
+        """Create the stopped loop."""
+        self.loop = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """If the loop thread is running."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Start the loop thread if not running."""
+        with self._lock:
+            if self.running:
+                return
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self.thread = threading.Thread(
+                target=self._run,
+                args=(self.loop, ready),
+                name="atak-asyncio",
+                daemon=True,
+            )
+            self.thread.start()
+            ready.wait()
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        """Run `loop` until stopped, then cancel it's tasks and close it."""
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the loop, cancelling the running tasks."""
+        with self._lock:
+            if not self.running:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            self.loop = self.thread = None
+
+    def spawn(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        Run coroutine `coro` on the loop, starting it if needed.
+
+        Returns a thread-safe future of the result, exceptions raised by
+        the coroutine are also logged.
+
+        :raises RuntimeError: if the UI channel is not installed, and can't
+            be installed on the default tk root from this thread
+        """
+        try:
+            install_ui()
+        except RuntimeError:
+            coro.close()
+            raise
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(_log_exception)
+        return future
+
+
+def _log_exception(future: concurrent.futures.Future):
+    """Log the exception raised by a spawned coroutine."""
+    if not future.cancelled() and future.exception() is not None:
+        log.error(
+            "exception in spawned coroutine", exc_info=future.exception()
+        )
+
+
+LOOP = AsyncLoop()
+
+
+def install_ui():
+    """
+    Install the UI channel on the default tk root if not installed.
+
+    :raises RuntimeError: if there is no default root, or when not called
+        from the main thread, which is taken to run tk
+    """
+    if UI.thread is not None:
+        return
+    root = getattr(tkinter, "_default_root", None)
+    main = threading.current_thread() is threading.main_thread()
+    if root is None or not main:
+        raise RuntimeError(
+            "the UI channel is not installed, run the app with "
+            "aioloop.mainloop() or call uithread.install(root) from the "
+            "tk thread"
+        )
+    UI.install(root)
+
+
+def spawn(coro: Coroutine) -> concurrent.futures.Future:
+    """Run `coro` on the background event loop, see `AsyncLoop.spawn`."""
+    return LOOP.spawn(coro)
+
+
+async def on_ui(callback: Callable, *args: Any) -> Any:
+    """
+    Call `callback` with `args` on the UI thread and return it's result.
+
+    :raises RuntimeError: if the UI channel is not installed
+    """
+    if UI.thread is None:
+        raise RuntimeError(
+            "the UI channel is not installed, on_ui would run the callback "
+            "outside the tk thread"
+        )
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(callback(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    UI.call(run)
+    return await asyncio.wrap_future(future)
+
+
+def mainloop(widget: Any):
+    """
+    Run the tk mainloop of `widget` with the background event loop.
+
+    Updates from coroutines are pumped to the tk thread while it runs, and
+    the event loop is stopped when the mainloop exits.
+    """
+    UI.install(widget)
+    LOOP.start()
+    try:
+        widget.mainloop()
+    finally:
+        LOOP.stop()
+        UI.uninstall()
@@ -0,0 +1,173 @@
+"""
+Taktk template compiler.
+
+Turns a parsed `Template.Item` tree into a python render function, so that
+rendering a template does not walk and dispatch on the tree anymore.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import itertools
+import linecache
+from typing import Any, Callable, Optional
+
+from .writeable import compile_code
+
+_counter = itertools.count()
+
+
+class Compiler:
+    """Generates the source of a render function from an item tree."""
+
+    constants: dict[str, Any]
+    lines: list[str]
+
+    def __init__(self):
+        """Create an empty compiler."""
+        self.constants = {}
+        self.lines = []
+        self._names = itertools.count()
+
+    def constant(self, value: Any, prefix: str = "k") -> str:
+        """Store `value` in the function globals, return it's name."""
+        name = f"_{prefix}{next(self._names)}"
+        self.constants[name] = value
+        return name
+
+    def variable(self) -> str:
+        """Return a new local variable name."""
+        return f"_c{next(self._names)}"
+
+    def emit(self, line: str, indent: int = 1):
+        """Add a line to the function body."""
+        self.lines.append("    " * indent + line)
+
+    def component(self, name: str) -> str:
+        """Return the expression evaluating to component `name`."""
+        from .template import get_component
+
+        if name[0].islower():
+            return self.constant(get_component(name), "C")
+        else:
+            return f"namespace[{name!r}]"
+
+    def item(
+        self,
+        item,
+        parent: str,
+        indent: int = 1,
+        made: Optional[str] = None,
+        blocks: str = "blocks",
+    ) -> Optional[str]:
+        """
+        Emit the code rendering `item` under `parent`.
+
+        Returns the variable holding the created object, if any. When
+        `made` is given, the created components are appended to that list.
+        The `!enum` blocks created at any depth are appended to `blocks`.
+        """
+        from .template import EnumBlock, TagType
+
+        if item.type == TagType.TAG:
+            alias, attrs = item.args
+            var = self.variable()
+            self.emit(
+                f"{var} = {self.component(item.name)}("
+                f"parent={parent}, attrs={self.constant(attrs, 'A')}, "
+                "namespace=namespace)",
+                indent,
+            )
+            if alias is not None:
+                self.emit(f"namespace[{alias!r}] = {var}", indent)
+            if made is not None:
+                self.emit(f"{made}.append({var})", indent)
+            for child in item.children:
+                self.item(child, var, indent, blocks=blocks)
+            return var
+        elif item.type == TagType.SPECIAL and item.name == "if":
+            (condition,) = item.args
+            code = self.constant(compile_code(condition), "E")
+            self.emit(f"if eval({code}, {{}}, namespace):", indent)
+            self.emit("pass", indent + 1)
+            for child in item.children:
+                self.item(child, parent, indent + 1, made, blocks)
+            return None
+        elif item.type == TagType.SPECIAL and item.name == "enum":
+            obj, alias, key = item.args
+            var = self.variable()
+            self.emit(
+                f"{var} = {self.constant(EnumBlock, 'C')}("
+                f"{self.constant(compile_fragment(item.children), 'R')}, "
+                f"parent={parent}, namespace=namespace, obj={obj!r}, "
+                f"alias={alias!r}, key={key!r})",
+                indent,
+            )
+            self.emit(f"{blocks}.append({var})", indent)
+            return var
+        else:
+            raise NotImplementedError()
+
+    def build(self) -> Callable:
+        """Build the `render` function from the emitted lines."""
+        source = "\n".join(self.lines) + "\n"
+        filename = f"<atak template {next(_counter)}>"
+        linecache.cache[filename] = (
+            len(source),
+            None,
+            source.splitlines(True),
+            filename,
+        )
+        scope = dict(self.constants)
+        exec(compile(source, filename, "exec"), scope)
+        return scope["render"]
+
+    def compile(self, root) -> Callable:
+        """
+        Compile the tree `root` to a `render(parent, namespace)` returning
+        the root component, and the list of the `!enum` blocks it created
+        at any depth, to destroy with it.
+        """
+        self.emit("def render(parent, namespace):", 0)
+        self.emit("blocks = []")
+        if root is None:
+            self.emit("return None, blocks")
+        else:
+            self.emit(f"return {self.item(root, 'parent')}, blocks")
+        return self.build()
+
+    def compile_fragment(self, items) -> Callable:
+        """
+        Compile `items` to a `render(parent, namespace)` rendering them
+        all under `parent`, and returning the list of the components it
+        created at the top level, and the list of the `!enum` blocks it
+        created at any depth.
+        """
+        self.emit("def render(parent, namespace):", 0)
+        self.emit("made = []")
+        self.emit("blocks = []")
+        for item in items:
+            self.item(item, "parent", made="made")
+        self.emit("return made, blocks")
+        return self.build()
+
+
+def compile_tree(root) -> Callable:
+    """Compile `Template.Item` tree to a render function, see `compile`."""
+    return Compiler().compile(root)
+
+
+def compile_fragment(items) -> Callable:
+    """Compile sibling items, see `Compiler.compile_fragment`."""
+    return Compiler().compile_fragment(items)
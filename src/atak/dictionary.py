@@ -2,11 +2,11 @@ from pathlib import Path
 
 import yaml
 
-from .writeable import Writeable
+from .writeable import Subscriptions, Writeable
 
 
 class Dictionary(dict):
-    subscribers = set()
+    subscribers = Subscriptions()
     dictionary = None
 
     def __init__(self, data, language=None):
@@ -25,7 +25,7 @@ class Dictionary(dict):
         import builtins
 
         builtins._ = self
-        for subscriber in tuple(Dictionary.subscribers):
+        for subscriber in Dictionary.subscribers:
             try:
                 subscriber()
             except:
@@ -72,12 +72,14 @@ class Dictionaries:
 
 
 class Translation(Writeable):
+    __slots__ = ("expr",)
+
     def __init__(self, expr: str):
         """
         Creates the listener on the namespace with defined name
         """
         self.expr = expr
-        self.subscribers = set()
+        Writeable.__init__(self)
         Dictionary.subscribe(self.update)
 
     def get(self):
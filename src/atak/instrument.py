@@ -0,0 +1,331 @@
+"""
+Taktk reactive graph instrumentation.
+
+Opt-in counters and timings for the notifications of Writeables and
+Namespaces, to find what triggers costly updates. Nothing is recorded,
+and nothing costs, until `enable` is called.
+
+    from atak import instrument
+
+    profiler = instrument.enable()
+    ...
+    print(profiler.report())
+    open("graph.dot", "w").write(profiler.dot())
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import time
+import weakref
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from .writeable import BATCH, Batch, Namespace, Subscribeable, Writeable
+
+PROFILER: "Optional[Instrumentation]" = None
+
+
+class SourceStats:
+    """Notification counters of a Writeable or Namespace."""
+
+    __slots__ = (
+        "notifications",
+        "fanout",
+        "max_fanout",
+        "checks",
+        "changes",
+        "check_time",
+    )
+
+    def __init__(self):
+        """Create zeroed counters."""
+        self.notifications = self.fanout = self.max_fanout = 0
+        self.checks = self.changes = 0
+        self.check_time = 0.0
+
+
+class SubscriberStats:
+    """Call counters of a subscriber."""
+
+    __slots__ = ("calls", "time", "max_time")
+
+    def __init__(self):
+        """Create zeroed counters."""
+        self.calls = 0
+        self.time = self.max_time = 0.0
+
+
+def describe(callback: Callable) -> str:
+    """Return the qualified name of `callback`."""
+    func = getattr(callback, "__func__", callback)
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class Instrumentation:
+    """
+    Records the notifications of the reactive graph.
+
+    Sources, Writeables and Namespaces, are held weakly. Subscribers are
+    aggregated by qualified name, so all the instances of a handler share
+    their counters.
+    """
+
+    clock: Callable[[], float]
+    sources: "weakref.WeakKeyDictionary[Subscribeable, SourceStats]"
+    subscribers: dict[str, SubscriberStats]
+    labels: "weakref.WeakKeyDictionary[Subscribeable, str]"
+    known: "weakref.WeakSet[Subscribeable]"
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """Create the instrumentation, timing with `clock`."""
+        self.clock = clock
+        self.sources = weakref.WeakKeyDictionary()
+        self.subscribers = {}
+        self.labels = weakref.WeakKeyDictionary()
+        self.known = weakref.WeakSet()
+        self._patched = []
+
+    @property
+    def installed(self) -> bool:
+        """If the instrumentation is recording."""
+        return bool(self._patched)
+
+    def _patch(self, cls: type, attr: str, make: Callable):
+        """Replace `cls.attr` by `make(original)`."""
+        original = cls.__dict__[attr]
+        self._patched.append((cls, attr, original))
+        setattr(cls, attr, make(original))
+
+    def install(self):
+        """Start recording, by wrapping the notification methods."""
+        if self.installed:
+            return
+        profiler = self
+        clock = self.clock
+
+        def warn_subscribers(original):
+            @wraps(original)
+            def warn_subscribers(self):
+                profiler.notified(self, len(self._subscribers or ()))
+                original(self)
+
+            return warn_subscribers
+
+        def warn_key_subscribers(original):
+            @wraps(original)
+            def warn_key_subscribers(self, item):
+                subscribers = self._key_subscribers.get(item)
+                profiler.notified(self, len(subscribers or ()))
+                original(self, item)
+
+            return warn_key_subscribers
+
+        def watch_changes(original):
+            @wraps(original)
+            def watch_changes(self):
+                if BATCH.depth > 0:
+                    return original(self)
+                start = clock()
+                changed = original(self)
+                profiler.checked(self, changed, clock() - start)
+                return changed
+
+            return watch_changes
+
+        def call(original):
+            @wraps(original)
+            def call(self, callback):
+                start = clock()
+                try:
+                    original(self, callback)
+                finally:
+                    profiler.called(callback, clock() - start)
+
+            return call
+
+        def subscribe(original):
+            @wraps(original)
+            def subscribe(self, subscriber):
+                profiler.known.add(self)
+                original(self, subscriber)
+
+            return subscribe
+
+        def subscribe_key(original):
+            @wraps(original)
+            def subscribe_key(self, item, subscriber):
+                profiler.known.add(self)
+                original(self, item, subscriber)
+
+            return subscribe_key
+
+        self._patch(Subscribeable, "warn_subscribers", warn_subscribers)
+        self._patch(Namespace, "warn_key_subscribers", warn_key_subscribers)
+        self._patch(Writeable, "watch_changes", watch_changes)
+        self._patch(Namespace, "watch_changes", watch_changes)
+        self._patch(Batch, "call", call)
+        self._patch(Subscribeable, "subscribe", subscribe)
+        self._patch(Namespace, "subscribe_key", subscribe_key)
+
+    def uninstall(self):
+        """Stop recording, restoring the original methods."""
+        while self._patched:
+            cls, attr, original = self._patched.pop()
+            setattr(cls, attr, original)
+
+    def source(self, obj: Subscribeable) -> SourceStats:
+        """Return the counters of `obj`."""
+        try:
+            return self.sources[obj]
+        except KeyError:
+            stats = self.sources[obj] = SourceStats()
+            return stats
+
+    def notified(self, obj: Subscribeable, fanout: int):
+        """Record `obj` warning `fanout` subscribers."""
+        stats = self.source(obj)
+        stats.notifications += 1
+        stats.fanout += fanout
+        stats.max_fanout = max(stats.max_fanout, fanout)
+
+    def checked(self, obj: Subscribeable, changed: bool, elapsed: float):
+        """Record `obj` checking for changes."""
+        stats = self.source(obj)
+        stats.checks += 1
+        stats.changes += bool(changed)
+        stats.check_time += elapsed
+
+    def called(self, callback: Callable, elapsed: float):
+        """Record a call to subscriber `callback`."""
+        name = describe(callback)
+        try:
+            stats = self.subscribers[name]
+        except KeyError:
+            stats = self.subscribers[name] = SubscriberStats()
+        stats.calls += 1
+        stats.time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+
+    def name(self, obj: Subscribeable, label: str):
+        """Use `label` for `obj` in the report and graph."""
+        self.labels[obj] = label
+        self.known.add(obj)
+
+    def label(self, obj: Any) -> str:
+        """Return the label of `obj`."""
+        try:
+            return self.labels[obj]
+        except (KeyError, TypeError):
+            return f"{type(obj).__name__}@{id(obj):x}"
+
+    def reset(self):
+        """Zero all the counters."""
+        self.sources = weakref.WeakKeyDictionary()
+        self.subscribers = {}
+
+    def report(self, limit: int = 10) -> str:
+        """
+        Return a text report of the `limit` most notifying sources and
+        the `limit` most time consuming subscribers.
+        """
+        lines = [
+            f"{'source':<40} {'notif':>7} {'fanout':>7} {'max':>5} "
+            f"{'checks':>7} {'changes':>7} {'ms':>9}"
+        ]
+        sources = sorted(
+            self.sources.items(),
+            key=lambda item: item[1].notifications,
+            reverse=True,
+        )
+        for obj, stats in sources[:limit]:
+            average = stats.fanout / max(stats.notifications, 1)
+            lines.append(
+                f"{self.label(obj)[:40]:<40} {stats.notifications:>7} "
+                f"{average:>7.1f} "
+                f"{stats.max_fanout:>5} {stats.checks:>7} "
+                f"{stats.changes:>7} {stats.check_time * 1000:>9.2f}"
+            )
+        lines.append("")
+        lines.append(
+            f"{'subscriber':<56} {'calls':>7} {'ms':>9} {'max ms':>9}"
+        )
+        subscribers = sorted(
+            self.subscribers.items(),
+            key=lambda item: item[1].time,
+            reverse=True,
+        )
+        for name, stats in subscribers[:limit]:
+            lines.append(
+                f"{name[-56:]:<56} {stats.calls:>7} "
+                f"{stats.time * 1000:>9.2f} {stats.max_time * 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def edges(self) -> list[tuple[str, str, Optional[str]]]:
+        """
+        Return the subscriptions of the known sources, as
+        `(source, subscriber, variable)` labels.
+        """
+        edges = []
+        for obj in list(self.known):
+            source = self.label(obj)
+            for callback in obj._subscribers or ():
+                edges.append((source, self._target(callback), None))
+            if isinstance(obj, Namespace):
+                for item, callbacks in list(obj._key_subscribers.items()):
+                    for callback in callbacks:
+                        edges.append((source, self._target(callback), item))
+        return edges
+
+    def _target(self, callback: Callable) -> str:
+        """Return the graph node of subscriber `callback`."""
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, Subscribeable):
+            return self.label(owner)
+        return describe(callback)
+
+    def dot(self) -> str:
+        """Return the subscription graph in graphviz DOT format."""
+
+        def quote(text: str) -> str:
+            return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+        lines = ["digraph atak {", "    rankdir=LR;"]
+        for obj in list(self.known):
+            lines.append(f"    {quote(self.label(obj))} [shape=box];")
+        for source, target, item in self.edges():
+            attrs = "" if item is None else f" [label={quote(item)}]"
+            lines.append(f"    {quote(source)} -> {quote(target)}{attrs};")
+        lines.append("}")
+        return "\n".join(lines)
+
+
+def enable(clock: Callable[[], float] = time.perf_counter) -> Instrumentation:
+    """Start recording in a new `Instrumentation`, and return it."""
+    global PROFILER
+    disable()
+    PROFILER = Instrumentation(clock)
+    PROFILER.install()
+    return PROFILER
+
+
+def disable():
+    """Stop recording."""
+    global PROFILER
+    if PROFILER is not None:
+        PROFILER.uninstall()
+        PROFILER = None
@@ -18,7 +18,7 @@ def parse_media_spec(spec):
 
 
 def parse_media_spec_props(props):
-    from .component.parser import evaluate_literal
+    from .template import evaluate_literal
 
     props = props.split(";")
     return {
@@ -1,5 +1,5 @@
 import time
-from threading import Lock, Thread
+from threading import Lock
 
 import yaml
 from PIL import ImageTk
@@ -10,6 +10,7 @@ from ttkbootstrap.utility import *
 
 from . import Nil
 from .media import get_image
+from .uithread import UI
 
 
 class Notification:
@@ -67,6 +68,9 @@ class Notification:
                 pass
 
     def show(self):
+        if UI.defers():
+            UI.call(self.show)
+            return
         self.root = window = Toplevel(overrideredirect=True, alpha=0.7)
         window.columnconfigure(0, weight=1)
         window.rowconfigure(0, weight=1)
@@ -102,7 +106,7 @@ class Notification:
         ).grid(row=1, column=1, sticky=NSEW, padx=10, pady=(0, 5))
 
         window.bind("<ButtonPress>", self.hide)
-        Thread(target=Notification.add, args=(self,)).start()
+        window.after_idle(Notification.add, self)
         window.bell()
 
         if self.duration is not None:
@@ -0,0 +1,200 @@
+"""
+Taktk observable collections.
+
+`ObservableList` and `ObservableDict` emit a `Change` for each in-place
+mutation, so templates and bindings can apply single item edits instead
+of rebuilding from the whole collection. Stored in a `Namespace`, they
+also warn the subscribers of their variable like a reassignment would.
+
+They compare equal to lists and dicts of the same items, but are hashed
+by identity so reads of them can be tracked.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, Iterable
+
+from . import Nil
+from .writeable import Change, Observable
+
+__all__ = ["Change", "Observable", "ObservableDict", "ObservableList"]
+
+
+class ObservableList(Observable, MutableSequence):
+    """A list emitting insert, remove, set and move changes."""
+
+    __slots__ = ("_items",)
+    _items: list
+
+    def __init__(self, items: Iterable = ()):
+        """Create the list with `items`."""
+        Observable.__init__(self)
+        self._items = list(items)
+
+    def _index(self, index: int) -> int:
+        """Return the positive position of `index`."""
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError("list index out of range")
+        return index
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        self._read()
+        return len(self._items)
+
+    def __getitem__(self, index: "int | slice") -> Any:
+        """Return the item at `index`, or a list for slices."""
+        self._read()
+        return self._items[index]
+
+    def __iter__(self):
+        """Iterate over the items."""
+        self._read()
+        return iter(self._items)
+
+    def __contains__(self, value: Any) -> bool:
+        """Return if `value` is in the list."""
+        self._read()
+        return value in self._items
+
+    def __setitem__(self, index: "int | slice", value: Any):
+        """Set the item at `index`, slices emit a reset."""
+        if isinstance(index, slice):
+            self._items[index] = value
+            self.emit("reset")
+            return
+        index = self._index(index)
+        old = self._items[index]
+        self._items[index] = value
+        self.emit("set", index, value, old)
+
+    def __delitem__(self, index: "int | slice"):
+        """Remove the item at `index`, slices emit a reset."""
+        if isinstance(index, slice):
+            del self._items[index]
+            self.emit("reset")
+            return
+        index = self._index(index)
+        old = self._items.pop(index)
+        self.emit("remove", index, None, old)
+
+    def insert(self, index: int, value: Any):
+        """Insert `value` before `index`."""
+        length = len(self._items)
+        if index < 0:
+            index = max(index + length, 0)
+        index = min(index, length)
+        self._items.insert(index, value)
+        self.emit("insert", index, value)
+
+    def move(self, index: int, target: int):
+        """Move the item at `index` to position `target`."""
+        index = self._index(index)
+        target = self._index(target)
+        if index == target:
+            return
+        value = self._items.pop(index)
+        self._items.insert(target, value)
+        self.emit("move", index, value, None, target)
+
+    def clear(self):
+        """Remove all the items."""
+        self._items.clear()
+        self.emit("reset")
+
+    def sort(self, *args: Any, **kwargs: Any):
+        """Sort the list in place."""
+        self._items.sort(*args, **kwargs)
+        self.emit("reset")
+
+    def reverse(self):
+        """Reverse the list in place."""
+        self._items.reverse()
+        self.emit("reset")
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the items with a list or observable list."""
+        if isinstance(other, ObservableList):
+            other = other._items
+        return self._items == other
+
+    __hash__ = Observable.__hash__
+
+    def __repr__(self) -> str:
+        """Reproduce the list."""
+        return f"ObservableList({self._items!r})"
+
+
+class ObservableDict(Observable, MutableMapping):
+    """A dict emitting set and remove changes."""
+
+    __slots__ = ("_items",)
+    _items: dict
+
+    def __init__(self, items: Any = (), **kwargs: Any):
+        """Create the dict with `items`, like `dict`."""
+        Observable.__init__(self)
+        self._items = dict(items, **kwargs)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        self._read()
+        return len(self._items)
+
+    def __getitem__(self, key: Any) -> Any:
+        """Return the value of `key`."""
+        self._read()
+        return self._items[key]
+
+    def __iter__(self):
+        """Iterate over the keys."""
+        self._read()
+        return iter(self._items)
+
+    def __contains__(self, key: Any) -> bool:
+        """Return if `key` is in the dict."""
+        self._read()
+        return key in self._items
+
+    def __setitem__(self, key: Any, value: Any):
+        """Set the value of `key`."""
+        old = self._items.get(key, Nil)
+        self._items[key] = value
+        self.emit("set", key, value, old)
+
+    def __delitem__(self, key: Any):
+        """Remove `key`."""
+        old = self._items.pop(key)
+        self.emit("remove", key, None, old)
+
+    def clear(self):
+        """Remove all the keys."""
+        self._items.clear()
+        self.emit("reset")
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the items with a dict or observable dict."""
+        if isinstance(other, ObservableDict):
+            other = other._items
+        return self._items == other
+
+    __hash__ = Observable.__hash__
+
+    def __repr__(self) -> str:
+        """Reproduce the dict."""
+        return f"ObservableDict({self._items!r})"
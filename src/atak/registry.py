@@ -0,0 +1,127 @@
+"""
+Taktk component registry.
+
+Resolves template tag names to component classes once, and caches them
+so rendering does not go through the import machinery.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from importlib import import_module
+from types import ModuleType
+from typing import Callable, Optional
+
+BUILTIN = "taktk.component.builtin"
+
+
+class ComponentRegistry:
+    """Resolves and caches component classes by tag name."""
+
+    builtin: str
+    libraries: "dict[str, ModuleType | str]"
+    registered: dict[str, type]
+    cache: dict[str, type]
+
+    def __init__(self, builtin: str = BUILTIN):
+        """Create a registry, resolving unprefixed names in `builtin`."""
+        self.builtin = builtin
+        self.libraries = {}
+        self.registered = {}
+        self.cache = {}
+
+    def register(self, name: str, component: Optional[type] = None):
+        """
+        Register `component` under tag `name`, can be used as decorator.
+
+        Explicitly registered components take precedence on libraries.
+        """
+        if component is None:
+            return lambda component: self.register(name, component)
+        self.registered[name] = component
+        self.cache[name] = component
+        return component
+
+    def register_library(self, prefix: str, module: "ModuleType | str"):
+        """
+        Resolve names as `prefix.name` in `module`.
+
+        `module` may be a module or it's import path, imported on first
+        use.
+        """
+        self.libraries[prefix] = module
+        for name in tuple(self.cache):
+            if name.startswith(prefix + ".") and name not in self.registered:
+                del self.cache[name]
+
+    def module(self, path: Optional[str] = None) -> ModuleType:
+        """Return the module of component path `path`."""
+        if path is None:
+            return import_module(self.builtin)
+        elif path in self.libraries:
+            module = self.libraries[path]
+            if isinstance(module, str):
+                module = self.libraries[path] = import_module(module)
+            return module
+        else:
+            package = import_module(self.builtin).__package__
+            return import_module(package + "." + path)
+
+    def resolve(self, name: str) -> type:
+        """Return the component class of tag `name`."""
+        try:
+            return self.cache[name]
+        except KeyError:
+            pass
+        if "." in name:
+            path, attr = name.rsplit(".", 1)
+        else:
+            path, attr = None, name
+        mod = self.module(path)
+        if hasattr(mod, attr):
+            component = self.cache[name] = getattr(mod, attr)
+            return component
+        else:
+            raise NameError(f"{attr} not in module {mod}")
+
+    def warm(self, root, on_error: Optional[Callable] = None) -> set[str]:
+        """
+        Resolve all the component names used in tree `root`.
+
+        Returns the names which could not be resolved, after passing their
+        errors to `on_error` if given.
+        """
+        from .template import TagType
+
+        failed = set()
+        stack = [] if root is None else [root]
+        while stack:
+            item = stack.pop()
+            stack.extend(item.children)
+            if item.type != TagType.TAG or not item.name[:1].islower():
+                continue
+            try:
+                self.resolve(item.name)
+            except (ImportError, NameError) as e:
+                failed.add(item.name)
+                if on_error is not None:
+                    on_error(e)
+        return failed
+
+    def clear(self):
+        """Forget the resolved components, except the registered ones."""
+        self.cache = dict(self.registered)
+
+
+COMPONENTS = ComponentRegistry()
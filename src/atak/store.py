@@ -1,71 +1,503 @@
+import atexit
+import errno
 import json
+import marshal
 import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from logging import getLogger
+from typing import Any, Callable, NamedTuple, Optional
+
+from . import Nil
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 
 log = getLogger(__name__)
 
 
+def _plain(value: Any) -> Any:
+    """Return a copy of `value` with partitions as plain dicts."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [_plain(item) for item in value]
+    else:
+        return value
+
+
+def _unlink(path: str):
+    """Remove file `path` if it exists."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _set_path(
+    obj: Any, path: "list | tuple", value: Any, create: bool = False
+):
+    """
+    Set tuple path `path` of `obj` to `value`, without saving. Missing
+    parent keys are set to new dicts if `create`.
+    """
+    for x in path[:-1]:
+        if not isinstance(obj, dict):
+            obj = obj[x]
+        elif create and x not in obj:
+            dict.__setitem__(obj, x, {})
+            obj = dict.__getitem__(obj, x)
+        else:
+            obj = dict.__getitem__(obj, x)
+    if isinstance(obj, dict):
+        dict.__setitem__(obj, path[-1], value)
+    else:
+        obj[path[-1]] = value
+
+
+def _row_key(path: tuple) -> str:
+    """Return the `SQLiteStore` row key of tuple path `path`."""
+    return json.dumps(list(path), separators=(",", ":"))
+
+
+class Serializer(NamedTuple):
+    """
+    Converts the content of a store to and from bytes. When `plain`, it
+    is given the content with partitions converted to dicts. A `json`
+    serializer only stores json values.
+    """
+
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    plain: bool = False
+    json: bool = False
+
+
+SERIALIZERS: dict[str, Serializer] = {
+    "json": Serializer(
+        lambda obj: json.dumps(obj, indent=2).encode(), json.loads, json=True
+    ),
+    "compact": Serializer(
+        lambda obj: json.dumps(obj, separators=(",", ":")).encode(),
+        json.loads,
+        json=True,
+    ),
+    "marshal": Serializer(marshal.dumps, marshal.loads, plain=True),
+    # only load pickled stores you wrote, pickle can run any code
+    "pickle": Serializer(
+        lambda obj: pickle.dumps(obj, protocol=5), pickle.loads, plain=True
+    ),
+}
+if orjson is not None:
+    SERIALIZERS["orjson"] = Serializer(orjson.dumps, orjson.loads, json=True)
+if ujson is not None:
+    SERIALIZERS["ujson"] = Serializer(
+        lambda obj: ujson.dumps(obj).encode(), ujson.loads, json=True
+    )
+
+
+def _serializer(serializer: "str | Serializer") -> Serializer:
+    """Return `serializer`, or the one named so in `SERIALIZERS`."""
+    if not isinstance(serializer, str):
+        return serializer
+    try:
+        return SERIALIZERS[serializer]
+    except KeyError:
+        raise ValueError(f"unknown serializer {serializer!r}") from None
+
+
 class Store(dict):
     """
     Creates a json settings file at path *sjs* _dkd df_ **ama**
+
+    The parsed file is kept in memory, and reloaded when it's
+    modification time or size changed, checked at most every
+    `check_interval` seconds. With a `check_interval` of None, the file
+    is only reloaded after `invalidate`, e.g. from a file watcher.
+
+    In `write_behind` mode, `save` only marks the store dirty, and a
+    background thread writes it `delay` seconds later, or as soon as
+    `threshold` saves are pending. `flush` writes it immediately, and
+    pending saves are flushed at exit. The file is always replaced
+    atomically.
+
+    Writes to the store and it's partitions in a `transaction` are saved
+    once when it ends, or rolled back if it raises.
+
+    The file is written by `serializer`, a `Serializer` or the name of
+    one in `SERIALIZERS`, indented json by default.
     """
 
-    def __init__(self, path: str, default: dict = {}):
+    check_interval: Optional[float]
+    hits: int
+    reloads: int
+    write_behind: bool
+    delay: float
+    threshold: int
+    flushes: int
+    serializer: Serializer
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        check_interval: Optional[float] = 1.0,
+        write_behind: bool = False,
+        delay: float = 0.5,
+        threshold: int = 100,
+        serializer: "str | Serializer" = "json",
+    ):
         """
         :param path: the path to the settings file
+        :param check_interval: the seconds between file modification checks
+        :param write_behind: to save from a background thread
+        :param delay: the seconds a save waits to be flushed
+        :param threshold: the number of pending saves flushed immediately
+        :param serializer: the format of the file
         """
+        self.serializer = _serializer(serializer)
         self.path = path
         self.page_stores = {}
         self.partitions = {}
+        self.check_interval = check_interval
+        self.hits = self.reloads = self.flushes = 0
+        self._state = None
+        self._checked = 0.0
+        self._stale = True
+        self.write_behind = write_behind
+        self.delay = delay
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty_since = None
+        self._pending = 0
+        self._thread = None
+        self._closed = False
+        self._depth = 0
+        self._assigned = False
+        if write_behind:
+            atexit.register(self.close)
         super().__init__(default)
         try:
             self.load()
-        except Exception:
-            self.save()
+        except FileNotFoundError:
+            self._create()
+
+    def _create(self):
+        """Write a new store, with it's defaults."""
+        self.save()
+
+    def _file_state(self) -> Optional[tuple[int, int]]:
+        """Return the modification time and size of the file."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
 
     def load(self):
         """
         Loads the file from specified `path`
 
         :raises OSError: in case the faile to open the file
-        :param c: dd
         """
-        with open(self.path) as f:
-            self.update(json.loads(f.read()))
+        state = self._file_state()
+        with open(self.path, "rb") as f:
+            self._merge(self.serializer.loads(f.read()))
+        self._state = state
+        self._checked = time.monotonic()
+        self._stale = False
+        self.reloads += 1
 
     def save(self):
-        with open(self.path, "w") as f:
-            f.write(json.dumps(self, indent=2))
+        """
+        Write the store, or mark it dirty in write behind mode.
+
+        A save with no key set since the last one, like after mutating a
+        value in place, saves every key, see `_save_all`.
+        """
+        with self._lock:
+            if not self._assigned:
+                self._save_all()
+            self._assigned = False
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._pending += 1
+            if self._depth:
+                return
+        self._schedule()
+
+    def _save_all(self):
+        """Mark every key changed, the file is always written whole."""
+
+    def _schedule(self):
+        """Write the pending changes, now or from the flushing thread."""
+        with self._lock:
+            if self.write_behind and not self._closed:
+                self._start()
+                self._wakeup.notify()
+                return
+        self.flush()
+
+    @property
+    def root(self) -> "Store":
+        """The store holding the file."""
+        return self
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group the writes to the store and it's partitions into one save.
+
+        Other threads can't access the store until the transaction ends.
+        If it raises, the store and it's partitions are restored to their
+        state at it's start. Nested transactions join the outer one.
+        """
+        root = self.root
+        # refresh unlocked, a load takes the io lock before the lock
+        root.refresh()
+        with root._lock:
+            if root._depth == 0:
+                backup = root._backup()
+            dirty, pending = root._dirty_since, root._pending
+            root._depth += 1
+            try:
+                yield self
+            except BaseException:
+                if root._depth == 1:
+                    root._restore(backup)
+                    root._dirty_since, root._pending = dirty, pending
+                raise
+            finally:
+                root._depth -= 1
+            changed = root._depth == 0 and root._pending > pending
+        if changed:
+            root._schedule()
+
+    def _backup(self) -> Any:
+        """Return the state transactions are rolled back to."""
+        return _plain(self)
+
+    def _merge(self, data: dict):
+        """Update the store with `data`, keeping the partitions in place."""
+        children = {
+            child.name: child
+            for registry in (self.partitions, self.page_stores)
+            for child in registry.values()
+        }
+        for key, value in data.items():
+            child = children.get(key)
+            if child is not None and isinstance(value, dict):
+                child._merge(value)
+                value = child
+            dict.__setitem__(self, key, value)
+
+    def _restore(self, data: dict):
+        """Restore the content of the store and it's partitions."""
+        children = {}
+        for registry in (self.partitions, self.page_stores):
+            for key, child in list(registry.items()):
+                if child.name in data:
+                    children[child.name] = child
+                else:
+                    del registry[key]
+        dict.clear(self)
+        for key, value in data.items():
+            if key in children:
+                children[key]._restore(value)
+                value = children[key]
+            dict.__setitem__(self, key, value)
+
+    def flush(self) -> bool:
+        """
+        Write the pending changes now, returns if there were any.
+
+        The changes are taken by `_collect` and written by `_write`, or
+        given back to `_requeue` if writing them fails.
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._dirty_since is None:
+                    return False
+                try:
+                    changes = self._collect()
+                except RuntimeError:
+                    # mutated in place from another thread, retry later
+                    self._dirty_since = time.monotonic()
+                    return False
+                pending = self._pending
+                self._dirty_since = None
+                self._pending = 0
+            try:
+                self._write(changes)
+            except Exception:
+                with self._lock:
+                    self._requeue(changes)
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()
+                    self._pending += pending
+                raise
+            with self._lock:
+                self._state = self._file_state()
+                self._checked = time.monotonic()
+                self._stale = False
+                self.flushes += 1
+        return True
+
+    def _collect(self) -> Any:
+        """
+        Take the pending changes, called with the lock held.
+
+        :raises RuntimeError: if the store is mutated from another thread
+        """
+        return self._dump()
+
+    def _write(self, changes: Any):
+        """Write the changes taken by `_collect`."""
+        self._replace(changes)
+
+    def _requeue(self, changes: Any):
+        """Give back the changes `_write` failed to write."""
+
+    def _dump(self) -> bytes:
+        """Serialize the content of the store."""
+        if self.serializer.plain:
+            return self.serializer.dumps(_plain(self))
+        return self.serializer.dumps(self)
+
+    def _replace(self, data: bytes):
+        """Atomically replace the file content with `data`."""
+        temp = self._write_temp(data)
+        try:
+            os.replace(temp, self.path)
+        except BaseException:
+            _unlink(temp)
+            raise
+
+    def _write_temp(self, data: bytes) -> str:
+        """Write `data` to a temporary file next to the store's."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                os.chmod(temp, os.stat(self.path).st_mode & 0o777)
+            except OSError:
+                pass
+        except BaseException:
+            _unlink(temp)
+            raise
+        return temp
+
+    def _start(self):
+        """Start the flushing thread if not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="atak-store", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Flush the store when dirty for `delay`, until closed."""
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        return
+                    if self._dirty_since is None:
+                        self._wakeup.wait()
+                        continue
+                    remaining = self._dirty_since + self.delay
+                    remaining -= time.monotonic()
+                    if remaining <= 0 or self._pending >= self.threshold:
+                        break
+                    self._wakeup.wait(remaining)
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("while flushing Store %s: %s", self.path, e)
+
+    def close(self):
+        """Flush the pending changes and stop the flushing thread."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def refresh(self) -> bool:
+        """Reload the file if it changed, returns if it was reloaded."""
+        if self._dirty_since is not None or self._depth:
+            self.hits += 1
+            return False
+        if not self._stale:
+            now = time.monotonic()
+            if (
+                self.check_interval is None
+                or now - self._checked < self.check_interval
+            ):
+                self.hits += 1
+                return False
+            self._checked = now
+            if self._file_state() == self._state:
+                self.hits += 1
+                return False
+        self.load()
+        return True
+
+    def invalidate(self):
+        """Reload the file on the next read."""
+        self._stale = True
+
+    def stats(self) -> dict[str, int]:
+        """Return the read cache hit and reload counters."""
+        return dict(hits=self.hits, reloads=self.reloads)
 
     def __getitem__(self, item):
         try:
-            self.load()
+            self.refresh()
         except Exception as e:
-            log.info("while loading Store", self)
+            log.info("while loading Store %s", self.path)
             log.error(e)
             raise
         if isinstance(item, tuple):
             obj = self
             for x in item:
                 obj = obj[x]
-            return x
+            return obj
         else:
             return super().__getitem__(item)
 
-    def __setitem__(self, item, value):
+    def _assign(self, item, value):
+        """Set `item`, a key or a tuple path, to `value` in memory."""
         if isinstance(item, tuple):
-            *path, item = item
-            obj = self
-            for x in path:
-                obj = obj[x]
-            obj[item] = value
+            _set_path(self, item, value)
         else:
             super().__setitem__(item, value)
+        self._assigned = True
+
+    def __setitem__(self, item, value):
+        with self._lock:
+            self._assign(item, value)
         try:
             self.save()
         except Exception as e:
-            log.info("while saving Store", self)
+            log.info("while saving Store %s", self.path)
             log.error(e)
             raise
 
@@ -89,28 +521,438 @@ class StorePartition(Store):
     def __init__(self, store, name, default={}):
         self.store = store
         self.partitions = {}
+        self.page_stores = {}
         self.name = self.FORMAT.format(name)
         dict.__init__(self, default)
         try:
             self.load()
-        except:
+        except KeyError:
             self.save()
 
     def __setitem__(self, item, value):
-        dict.__setitem__(self, item, value)
-        self.save()
+        path = item if isinstance(item, tuple) else (item,)
+        self.store[(self.name, *path)] = value
 
     def __getitem__(self, item):
         return dict.__getitem__(self, item)
 
+    @property
+    def root(self) -> Store:
+        return self.store.root
+
     def save(self):
         self.store[self.name] = self
-        self.store.save()
 
     def load(self):
         data = self.store[self.name]
         self.update(data)
+        dict.__setitem__(self.store, self.name, self)
 
 
 class Pagestore(StorePartition):
     FORMAT = "~~[$__pageStore__('{0}')]~~"
+
+
+class SQLiteStore(Store):
+    """
+    A `Store` kept in an sqlite database in WAL mode.
+
+    Each top level key, and each key of a partition or page store, is a
+    row holding it's json value, keyed by it's json path. Saves only write
+    the rows of the keys set since the last one, in a single sqlite
+    transaction. A `save` with no key set since the last one, like after
+    mutating a value in place, rewrites every row, as does creating the
+    database. Changes committed by other connections are reloaded like
+    changes of a store file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        check_interval: Optional[float] = 1.0,
+        write_behind: bool = False,
+        delay: float = 0.5,
+        threshold: int = 100,
+        migrate: Optional[str] = None,
+    ):
+        """
+        :param path: the path to the database
+        :param migrate: a json store file imported in a new database
+        """
+        self._changed = set()
+        self._full = False
+        self._db_lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._db_lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS store "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                )
+            (rows,) = self._connection.execute(
+                "SELECT COUNT(*) FROM store"
+            ).fetchone()
+        super().__init__(
+            path, default, check_interval, write_behind, delay, threshold
+        )
+        if rows == 0:
+            if migrate is not None and os.path.exists(migrate):
+                self.migrate(migrate)
+            self._create()
+
+    def migrate(self, path: str):
+        """Import the keys of json store file `path`."""
+        with open(path) as f:
+            data = json.loads(f.read())
+        with self.transaction():
+            for key, value in data.items():
+                self[key] = value
+        log.info("migrated Store %s to %s", path, self.path)
+
+    def _file_state(self) -> Optional[int]:
+        """Return the version of the database changed by other writers."""
+        with self._db_lock:
+            (version,) = self._connection.execute(
+                "PRAGMA data_version"
+            ).fetchone()
+        return version
+
+    def load(self):
+        """Loads the rows of the database."""
+        state = self._file_state()
+        with self._db_lock:
+            rows = self._connection.execute(
+                "SELECT key, value FROM store"
+            ).fetchall()
+        data = {}
+        # partitions are loaded before their keys
+        rows = [(json.loads(key), value) for key, value in rows]
+        for path, value in sorted(rows, key=lambda row: len(row[0])):
+            obj = data
+            for x in path[:-1]:
+                obj = obj.setdefault(x, {})
+            obj[path[-1]] = json.loads(value)
+        self._merge(data)
+        self._state = state
+        self._checked = time.monotonic()
+        self._stale = False
+        self.reloads += 1
+
+    def _save_all(self):
+        self._full = True
+
+    def _assign(self, item, value):
+        super()._assign(item, value)
+        self._changed.add(self._row(item))
+
+    def _row(self, item) -> tuple:
+        """Return the path of the row holding `item`."""
+        path = item if isinstance(item, tuple) else (item,)
+        obj = self
+        for depth, key in enumerate(path, 1):
+            obj = dict.get(obj, key)
+            if not isinstance(obj, StorePartition):
+                return path[:depth]
+        return path
+
+    def _rows(self, path: tuple, upserts: list, removed: list):
+        """Collect the changes to the row at `path` and it's sub rows."""
+        obj = self
+        for key in path:
+            if not isinstance(obj, dict) or key not in obj:
+                obj = Nil
+                break
+            obj = dict.__getitem__(obj, key)
+        row = _row_key(path)
+        # the row, and it's sub rows if it was a partition
+        removed.append((row, row[:-1] + ",", row[:-1] + "-"))
+        if obj is Nil:
+            return
+        elif isinstance(obj, StorePartition):
+            upserts.append((row, "{}"))
+            for key in obj:
+                self._rows((*path, key), upserts, removed)
+        else:
+            upserts.append((row, json.dumps(obj)))
+
+    def _collect(self) -> tuple[set, bool, list, list]:
+        """Take the changed rows, or every row."""
+        full = self._full
+        upserts, removed = [], []
+        if full:
+            # every key is a json list, between "[" and "\\"
+            removed.append(("[", "[", "\\"))
+        for path in [(key,) for key in self] if full else self._changed:
+            self._rows(path, upserts, removed)
+        changed, self._changed = self._changed, set()
+        self._full = False
+        return changed, full, upserts, removed
+
+    def _write(self, changes: tuple[set, bool, list, list]):
+        """Write the changed rows in one sqlite transaction."""
+        _, _, upserts, removed = changes
+        with self._db_lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM store WHERE key = ? OR (key > ? AND key < ?)",
+                removed,
+            )
+            self._connection.executemany(
+                "INSERT INTO store (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                upserts,
+            )
+
+    def _requeue(self, changes: tuple[set, bool, list, list]):
+        self._changed |= changes[0]
+        self._full = self._full or changes[1]
+
+    def close(self):
+        """Flush the pending changes and close the database."""
+        super().close()
+        with self._db_lock:
+            self._connection.close()
+
+
+class JournalStore(Store):
+    """
+    A `Store` saving each write as a line appended to a journal file.
+
+    The file at `path` is a snapshot, loaded then updated by
+    replaying the journal, and written with the defaults when the store
+    is created. Saves only append the keys or tuple paths set
+    since the last one, with their values. Once the journal grows past
+    `compact_size` bytes, it is renamed to `journal` + ".old" and merged
+    into a new snapshot from a background thread, while saves go to a new
+    journal.
+
+    The journal is never truncated, as another store may be appending to
+    it. An unterminated last record, torn by a crash or still being
+    written, is ignored by replays, and ended by the next append so
+    replays skip it like any invalid record. A record whose path can't be
+    set is skipped too. Records are json, so the snapshot `serializer`
+    must be a json one too.
+    """
+
+    journal: str
+    compact_size: int
+    sync: bool
+    compactions: int
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        check_interval: Optional[float] = 1.0,
+        write_behind: bool = False,
+        delay: float = 0.5,
+        threshold: int = 100,
+        serializer: "str | Serializer" = "json",
+        journal: Optional[str] = None,
+        compact_size: int = 1 << 20,
+        sync: bool = False,
+    ):
+        """
+        :param path: the path to the snapshot file
+        :param journal: the path to the journal, `path` + ".journal"
+        :param compact_size: the journal size compacted in the background
+        :param sync: to fsync the journal after each append
+        :raises ValueError: if `serializer` is not a json one
+        """
+        if not _serializer(serializer).json:
+            raise ValueError(
+                "JournalStore records are json, use a json serializer",
+                serializer,
+            )
+        self.journal = path + ".journal" if journal is None else journal
+        self.old = self.journal + ".old"
+        self.compact_size = compact_size
+        self.sync = sync
+        self.compactions = 0
+        self._default = _plain(default)
+        self._records = []
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+        super().__init__(
+            path,
+            default,
+            check_interval,
+            write_behind,
+            delay,
+            threshold,
+            serializer,
+        )
+
+    def _file_state(self) -> tuple:
+        """Return the modification time and size of both files."""
+        try:
+            stat = os.stat(self.journal)
+        except OSError:
+            journal = None
+        else:
+            journal = (stat.st_mtime_ns, stat.st_size)
+        return (super()._file_state(), journal)
+
+    def load(self):
+        """
+        Loads the snapshot, and replays the journals over it.
+
+        :raises FileNotFoundError: if there is no snapshot nor journal
+        """
+        with self._io_lock, self._lock:
+            while True:
+                state = self._file_state()
+                journals = [
+                    journal
+                    for journal in (self.old, self.journal)
+                    if os.path.exists(journal)
+                ]
+                if not journals and not os.path.exists(self.path):
+                    raise FileNotFoundError(
+                        errno.ENOENT, "no snapshot nor journal", self.path
+                    )
+                try:
+                    data = self._snapshot()
+                    for journal in journals:
+                        self._replay(journal, data)
+                except FileNotFoundError:
+                    # compacted by another store meanwhile, start over
+                    # from the new snapshot
+                    continue
+                break
+            self._merge(data)
+            self._state = state
+            self._checked = time.monotonic()
+            self._stale = False
+            self.reloads += 1
+
+    def _create(self):
+        """Write the defaults as the first snapshot."""
+        with self._io_lock:
+            self._replace(self._dump())
+            with self._lock:
+                self._state = self._file_state()
+
+    def _snapshot(self) -> dict:
+        """
+        Return the content of the snapshot, or the defaults if there is
+        none, which journals written before the first snapshot extend.
+        """
+        if not os.path.exists(self.path):
+            return _plain(self._default)
+        with open(self.path, "rb") as f:
+            return self.serializer.loads(f.read())
+
+    def _replay(self, journal: str, data: dict):
+        """Apply the complete, valid records of `journal` to `data`."""
+        end = 0
+        with open(journal, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    path, value = json.loads(line)
+                    _set_path(data, path, value, create=True)
+                except (ValueError, LookupError, TypeError) as e:
+                    log.warning(
+                        "skipping record at %d of %s: %r", end, journal, e
+                    )
+                end += len(line)
+
+    def _assign(self, item, value):
+        super()._assign(item, value)
+        path = list(item) if isinstance(item, tuple) else [item]
+        self._records.append((path, value))
+
+    def _save_all(self):
+        self._records.extend(([key], value) for key, value in self.items())
+
+    def _backup(self) -> tuple[dict, int]:
+        return super()._backup(), len(self._records)
+
+    def _restore(self, backup: tuple[dict, int]):
+        data, records = backup
+        super()._restore(data)
+        del self._records[records:]
+
+    def flush(self) -> bool:
+        """Append the pending records now, returns if there were any."""
+        if not super().flush():
+            return False
+        journal = self._state[1]
+        if journal is not None and journal[1] > self.compact_size:
+            self._compact_later()
+        return True
+
+    def _collect(self) -> tuple[list, str]:
+        """Take the pending records."""
+        text = "".join(json.dumps(record) + "\n" for record in self._records)
+        records, self._records = self._records, []
+        return records, text
+
+    def _write(self, changes: tuple[list, str]):
+        """Append the records to the journal."""
+        with open(self.journal, "a+b") as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # end the record torn by a crash, replays skip it
+                    f.write(b"\n")
+            f.write(changes[1].encode())
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+
+    def _requeue(self, changes: tuple[list, str]):
+        self._records[:0] = changes[0]
+
+    def compact(self) -> bool:
+        """
+        Merge the journal into a new snapshot, returns if it did.
+
+        The journal is only locked while it is renamed, the snapshot is
+        then rebuilt from the files, so saves are not delayed.
+        """
+        with self._compact_lock:
+            with self._io_lock:
+                # the journal of an interrupted compaction is merged first
+                if not os.path.exists(self.old):
+                    if not os.path.exists(self.journal):
+                        return False
+                    os.replace(self.journal, self.old)
+                with self._lock:
+                    self._state = self._file_state()
+            data = self._snapshot()
+            self._replay(self.old, data)
+            temp = self._write_temp(self.serializer.dumps(data))
+            with self._lock:
+                try:
+                    os.replace(temp, self.path)
+                except BaseException:
+                    _unlink(temp)
+                    raise
+                # replaying the old journal over the new snapshot gives the
+                # same state, so a crash before it is removed is harmless
+                os.unlink(self.old)
+                self._state = self._file_state()
+                self.compactions += 1
+        return True
+
+    def _compact_later(self):
+        """Compact from a background thread if not already running."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self._compact, name="atak-compact", daemon=True
+            )
+            self._compactor.start()
+
+    def _compact(self):
+        """Compact, logging the errors."""
+        try:
+            self.compact()
+        except Exception as e:
+            log.error("while compacting Store %s: %s", self.path, e)
@@ -16,19 +16,31 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import bisect
+import collections
 import dataclasses
 import decimal
 import enum
 import os.path
+import re
 import string
 from decimal import Decimal
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from pyoload import annotate
 
 from .dictionary import Translation
-from .writeable import Namespace, Writeable
+from .observable import ObservableList
+from .writeable import (
+    Change,
+    Namespace,
+    Writeable,
+    compile_code,
+    follow,
+    track_reads,
+)
 
 
 class TagType(enum.Enum):
@@ -43,12 +55,13 @@ SPACE = frozenset(" ")
 VARNAME = frozenset(string.ascii_letters + string.digits + "_")
 COMPONENT_NAME = VARNAME | frozenset(".")
 BRACKETS = dict(map(tuple, "(),[],{}".split(",")))
+CLOSING_BRACKETS = frozenset(BRACKETS.values())
 STRING_QUOTES = frozenset("\"'")
 INT = frozenset(string.digits)
 DECIMAL = frozenset(string.digits + ".")
 SLICE = INT | frozenset(":")
 POINT = DECIMAL | frozenset(",")
-ATTR_NAME = frozenset(":") | VARNAME
+ATTR_NAME = frozenset(":-") | VARNAME
 
 
 class State:
@@ -187,6 +200,11 @@ class State:
             attr += self[...]
             self += 1
         if not self or self[...] != "=":
+            if not attr and self and self[...] != "\n":
+                raise ValueError(
+                    f"unexpected {self[...]!r} at {self.row}:{self.col}",
+                    self.text,
+                )
             return attr, "True"
         else:
             self += 1
@@ -256,13 +274,13 @@ class State:
             self += 1
         return self[begin:...]
 
-    def next_enum(self) -> "tuple[str, tuple[str, str]]":
+    def next_enum(self) -> "tuple[State, str, tuple[str, ...]]":
         """Next enumerator."""
         begin = self.copy()
-        begin |= begin.skip_spaces()
+        begin.skip_spaces()
         state = begin.copy()
         state += len("!enum ")
-        state |= state.skip_spaces()
+        state.skip_spaces()
         b = state.copy()
         while state:
             if state[...][0] not in VARNAME:
@@ -295,13 +313,13 @@ class State:
         alias = tuple(map(str.strip, state[b:state].split(",")))
         return state, obj, alias
 
-    def next_if(self) -> "tuple[str, tuple[str, str]]":
+    def next_if(self) -> "tuple[State, str]":
         """Return next if statements parts."""
         begin = self.copy()
-        begin |= begin.skip_spaces()
+        begin.skip_spaces()
         state = begin.copy()
         state += len("!if ")
-        state |= state.skip_spaces()
+        state.skip_spaces()
         b = state.copy()
 
         while state and state[...][0] != "\n":
@@ -371,7 +389,7 @@ class State:
         attrs = {}
         while self:
             self.skip_spaces()
-            if self[...] == "#":
+            if not self or self[...] == "#":
                 break
             key, val = self.next_attr_value()
             if key:
@@ -383,6 +401,32 @@ class State:
 
         return Template.Item(type=TagType.TAG, name=name, args=(alias, attrs))
 
+    def parse_next_special(self) -> "Template.Item":
+        """Return next special instruction, `!enum` or `!if`."""
+        if self[self.idx : self.idx + 6] == "!enum ":
+            state, obj, alias = self.next_enum()
+            self |= state
+            self += 1
+            self.skip_spaces()
+            key = None
+            if self and self[...] not in "#\n":
+                attr, key = self.next_attr_value()
+                if attr != "key":
+                    raise ValueError(f"unknown !enum option {attr!r}", self)
+            self.next_line()
+            return Template.Item(
+                type=TagType.SPECIAL, name="enum", args=(obj, alias, key)
+            )
+        elif self[self.idx : self.idx + 4] == "!if ":
+            state, condition = self.next_if()
+            self |= state
+            self.next_line()
+            return Template.Item(
+                type=TagType.SPECIAL, name="if", args=(condition.strip(),)
+            )
+        else:
+            raise ValueError("unknown special instruction", self)
+
     @property
     def line(self) -> str:
         """Get the full current line."""
@@ -403,27 +447,270 @@ class State:
             cmd = self.parse_next_instruction()
             if cmd is not None:
                 tags.append(cmd)
-        if len(tags) == 0:
-            return None
+        return build_tree(tags)
+
+
+SPACES_RE = re.compile(r"(?: |\\\n)*")
+COMPONENT_NAME_RE = re.compile(r"[a-zA-Z0-9_.]*")
+ATTR_NAME_RE = re.compile(r"[a-zA-Z0-9_:-]*")
+MEDIA_HEAD_RE = re.compile(r"[^\W\d_]+:")
+MEDIA_CHUNK_RE = re.compile(r"[^{}\"'\s]*")
+VALUE_CHUNK_RE = re.compile(r"[^()\[\]{}\"'\s]*")
+ENUM_RE = re.compile(r"!enum +([a-zA-Z0-9_]*):.([^)]*)\)", re.S)
+STRING_RE = {
+    q: re.compile(rf"{q}[^{q}\\]*(?:\\.[^{q}\\]*)*{q}", re.S)
+    for q in STRING_QUOTES
+}
+
+
+class Tokenizer:
+    """
+    Single pass template parser, built on precompiled regular expressions.
+
+    Produces the same `Template.Item` trees as `State.parse`, but never
+    copies the remaining text and computes rows and columns only when
+    reporting errors, from a table of line offsets.
+    """
+
+    __slots__ = ("text", "pos", "_lines")
+    text: str
+    pos: int
+
+    def __init__(self, text: str):
+        """Create the tokenizer over `text`."""
+        self.text = text
+        self.pos = 0
+        self._lines = None
+
+    def position(self, idx: int) -> tuple[int, int]:
+        """Return the row and column of index `idx`."""
+        if self._lines is None:
+            self._lines = [0]
+            self._lines.extend(
+                m.end() for m in re.finditer("\n", self.text)
+            )
+        row = bisect.bisect_right(self._lines, idx)
+        return row, idx - self._lines[row - 1]
+
+    def error(self, message: str, idx: int) -> ValueError:
+        """Create a syntax error at index `idx`."""
+        row, col = self.position(idx)
+        return ValueError(f"{message} at {row}:{col}", self.text)
+
+    def skip_spaces(self, pos: int) -> int:
+        """Return the index after the spaces and continuations at `pos`."""
+        return SPACES_RE.match(self.text, pos).end()
+
+    def next_line(self, pos: int) -> int:
+        """Return the index following the next newline."""
+        nl = self.text.find("\n", pos)
+        return len(self.text) if nl == -1 else nl + 1
+
+    def string_end(self, pos: int) -> int:
+        """Return the index of closing quote of the string at `pos`."""
+        match = STRING_RE[self.text[pos]].match(self.text, pos)
+        if match is None:
+            raise self.error("unterminated string", pos)
+        return match.end() - 1
+
+    def value(self, pos: int) -> tuple[str, int]:
+        """Read the attribute value at `pos`, return it and it's end."""
+        text, end = self.text, len(self.text)
+        pos = begin = self.skip_spaces(pos)
+        head = MEDIA_HEAD_RE.match(text, pos)
+        if head is not None and text[pos : head.end() - 1].isalpha():
+            pos = head.end() - 1
+            depth = 0
+            while (pos := MEDIA_CHUNK_RE.match(text, pos).end()) < end:
+                char = text[pos]
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                elif char in STRING_QUOTES:
+                    pos = self.string_end(pos)
+                elif depth == 0:
+                    break
+                pos += 1
+            return text[begin:pos], pos
+        brackets = []
+        while (pos := VALUE_CHUNK_RE.match(text, pos).end()) < end:
+            char = text[pos]
+            if char in BRACKETS:
+                brackets.append(char)
+            elif char in STRING_QUOTES:
+                pos = self.string_end(pos)
+            elif char in CLOSING_BRACKETS:
+                if len(brackets) > 0 and BRACKETS[brackets[-1]] == char:
+                    brackets.pop()
+                else:
+                    raise self.error(f"unmatched {char!r}", pos)
+            elif len(brackets) == 0:
+                break
+            pos += 1
+        return text[begin:pos], pos
+
+    def tag(self, pos: int) -> "tuple[Template.Item, int]":
+        """Read the tag at `pos`, return it and the next line index."""
+        text, end = self.text, len(self.text)
+        name = COMPONENT_NAME_RE.match(text, pos + 1)
+        pos = name.end()
+        if pos < end and text[pos] == ":":
+            alias = COMPONENT_NAME_RE.match(text, pos + 1)
+            pos = alias.end()
+            alias = alias.group()
+        else:
+            alias = None
+        attrs = {}
+        while pos < end:
+            pos = self.skip_spaces(pos)
+            if pos >= end or text[pos] == "#":
+                break
+            key = ATTR_NAME_RE.match(text, pos)
+            pos = key.end()
+            if pos < end and text[pos] == "=":
+                val, pos = self.value(pos + 1)
+            elif key.group() or text[pos] == "\n":
+                val = "True"
+            else:
+                raise self.error(f"unexpected {text[pos]!r}", pos)
+            if key.group():
+                attrs[key.group()] = val
+            pos = self.skip_spaces(pos)
+            if pos >= end or text[pos] == "\n":
+                pos = self.next_line(pos)
+                break
+        item = Template.Item(
+            type=TagType.TAG, name=name.group(), args=(alias, attrs)
+        )
+        return item, pos
+
+    def special(self, pos: int) -> "tuple[Template.Item, int]":
+        """Read the special instruction at `pos`, like `tag`."""
+        text, end = self.text, len(self.text)
+        if text.startswith("!enum ", pos):
+            match = ENUM_RE.match(text, pos)
+            if match is None:
+                raise self.error("malformed !enum", pos)
+            obj, fields = match.groups()
+            alias = tuple(map(str.strip, fields.split(",")))
+            if len(alias) > 2:
+                raise self.error("too many fields after enum object", pos)
+            pos = self.skip_spaces(match.end())
+            key = None
+            if pos < end and text[pos] not in "#\n":
+                attr = ATTR_NAME_RE.match(text, pos)
+                if attr.group() != "key":
+                    raise self.error(f"unknown !enum option {attr[0]!r}", pos)
+                if attr.end() < end and text[attr.end()] == "=":
+                    key, pos = self.value(attr.end() + 1)
+                else:
+                    key = "True"
+            item = Template.Item(
+                type=TagType.SPECIAL, name="enum", args=(obj, alias, key)
+            )
+        elif text.startswith("!if ", pos):
+            condition = text[pos + 4 : self.next_line(pos)]
+            item = Template.Item(
+                type=TagType.SPECIAL, name="if", args=(condition.strip(),)
+            )
+        else:
+            raise self.error("unknown special instruction", pos)
+        return item, self.next_line(pos)
+
+    def next_instruction(self) -> "Optional[tuple[int, Template.Item]]":
+        """Parse the next instruction, return None at end of text."""
+        text, end = self.text, len(self.text)
+        pos = self.pos
+        while True:
+            pos = self.skip_spaces(start := pos)
+            indent = text.count(" ", start, pos)
+            if pos >= end:
+                self.pos = pos
+                return None
+            elif text[pos] in "#\n":
+                pos = self.next_line(pos)
+            else:
+                break
+        char = text[pos]
+        if char == "\\":
+            item, self.pos = self.tag(pos)
+            return indent, item
+        elif char == "!":
+            item, self.pos = self.special(pos)
+            return indent, item
         else:
-            last_indent, root = tags[0]
-            tree = []
-            last_tag = root
-            for indent, child in tags[1:]:
-                if indent > last_indent:
-                    tree.append((last_indent, last_tag))
-                elif indent < last_indent:
-                    while indent <= tree[-1][0]:
-                        tree.pop()
-                tree[-1][1].children.append(child)
-                child.parent = tree[-1][1]
-                last_indent = indent
-                last_tag = child
-            return root
+            raise ValueError(char)
+
+    def parse(self) -> "Template.Item":
+        """Parse the text content."""
+        tags = []
+        while (cmd := self.next_instruction()) is not None:
+            tags.append(cmd)
+        return build_tree(tags)
+
+
+def build_tree(tags: "list[tuple[int, Template.Item]]") -> "Template.Item":
+    """Nest the indented items, return the root item."""
+    if len(tags) == 0:
+        return None
+    else:
+        last_indent, root = tags[0]
+        tree = []
+        last_tag = root
+        for indent, child in tags[1:]:
+            if indent > last_indent:
+                tree.append((last_indent, last_tag))
+            elif indent < last_indent:
+                while indent <= tree[-1][0]:
+                    tree.pop()
+            tree[-1][1].children.append(child)
+            child.parent = tree[-1][1]
+            last_indent = indent
+            last_tag = child
+        return root
 
 
 def evaluate_literal(string: str, namespace=None):
-    """Evaluate a litteral from string."""
+    """
+    Evaluate a litteral from string.
+
+    Constant literals are memoized by `evaluate_constant`, only
+    expressions, translations and paths are evaluated on each call.
+
+    An `{expr}` is evaluated once, to a plain value. `{$name}` and
+    `{{expr}}` give Writeables, which follow the namespace variables
+    their getter reads and warn their subscribers when one of them is
+    set, so only the widgets bound to that variable reconfigure.
+    """
+    if len(string) > 2 and string[0] == "{" and string[-1] == "}":
+        if namespace is None:
+            raise ValueError(
+                "Unallowed Writeable in none namespaced context", string
+            )
+        code = string[1:-1]
+        if len(code) >= 2 and code[0] == "$":
+            return Writeable.from_name(namespace, code[1:])
+        if len(code) >= 2 and code[0] == "{" and code[-1] == "}":
+            code = code[1:-1]
+            if "||" in code:
+                get, set_ = code.split("||")
+            else:
+                get, set_ = code, ""
+            return Writeable.from_get_set(namespace, get, set_)
+        else:
+            return eval(compile_code(code), {}, namespace)
+    elif len(string) > 0 and string[0] == string[-1] == "/":
+        return Path(os.path.expandvars(string[1:-1]))
+    elif len(string) > 0 and string[0] == "[" and string[-1] == "]":
+        return Translation(string[1:-1])
+    else:
+        return evaluate_constant(string)
+
+
+@lru_cache(maxsize=4096)
+def evaluate_constant(string: str):
+    """Evaluate a constant litteral from string, memoized by source."""
     from .media import get_media
     import tkinter.constants
 
@@ -448,32 +735,11 @@ def evaluate_literal(string: str, namespace=None):
         return int(string)
     elif len(string_set - DECIMAL) == 0:
         return Decimal(string)
-    elif len(string) > 2 and b == "{" and e == "}":
-        if namespace is None:
-            raise ValueError(
-                "Unallowed Writeable in none namespaced context", string
-            )
-        code = string[1:-1]
-        if len(code) >= 2 and code[0] == "$":
-            return Writeable.from_name(namespace, code[1:])
-        if len(code) >= 2 and code[0] == "{" and code[-1] == "}":
-            code = code[1:-1]
-            if "||" in code:
-                get, set_ = code.split("||")
-            else:
-                get, set_ = code, ""
-            return Writeable.from_get_set(namespace, get, set_)
-        else:
-            return eval(code, {}, namespace)
     elif b in STRING_QUOTES:
         if e == b:
             return string[1:-1]
         else:
             raise ValueError("Unterminated string:", string)
-    elif string[0] == string[-1] == "/":
-        return Path(os.path.expandvars(string[1:-1]))
-    elif string[0] == "[" and string[-1] == "]":
-        return Translation(string[1:-1])
     elif ":" in string and len(string_set - (DECIMAL | SLICE)) == 0:
         if len(d := (string_set - SLICE)) > 0:
             raise ValueError("wrong slice", string, d)
@@ -552,6 +818,13 @@ class Template:
                     head += ":" + alias
                 if attrs:
                     head += "(" + " ".join(map("=".join, attrs.items())) + ")"
+            elif self.type == TagType.SPECIAL and self.name == "enum":
+                obj, alias, key = self.args
+                head = f"!enum {obj}:({', '.join(alias)})"
+                if key is not None:
+                    head += f" key={key}"
+            elif self.type == TagType.SPECIAL:
+                head = f"!{self.name} {' '.join(self.args)}"
             if len(self.children) > 0:
                 children = (
                     "{\n"
@@ -576,40 +849,296 @@ class Template:
 
     @classmethod
     def parse(cls, string: str) -> "Template":
-        """Load template from taktl source string."""
-        return Template(State(string.replace("\\\n", "")).parse())
+        """
+        Load template from taktl source string.
+
+        Uses the parsed template cache of `templatecache` if installed,
+        and resolves the component names it uses ahead of rendering.
+        """
+        from . import templatecache
+        from .registry import COMPONENTS
+
+        if templatecache.CACHE is not None:
+            root = templatecache.CACHE.lookup(string, parse_tree)
+        else:
+            root = parse_tree(string)
+        COMPONENTS.warm(root)
+        return Template(root)
+
+    @cached_property
+    def renderer(self) -> Callable:
+        """Compile the template to a `render(parent, namespace)` function."""
+        from .compiler import compile_tree
 
-    def eval(self, _namespace=None):
+        return compile_tree(self.root)
+
+    def eval(self, _namespace=None) -> tuple:
+        """
+        Render the template, and return the root component and the list
+        of the `!enum` blocks it created, to destroy with the component.
+        """
         namespace = self.namespace or _namespace
         assert namespace is not None, "No namespace specified!"
 
-        def sub_render(parent, item):
-            comp = item.render(parent, namespace)
-            for child in item.children:
-                sub_render(comp, child)
-            return comp
-
-        return sub_render(None, self.root)
+        return self.renderer(None, namespace)
 
     def __repr__(self) -> str:
         return str(self.root)
 
 
-def get_component(name, namespace=None):
-    from taktk.component import builtin
-    from importlib import import_module
+class EnumBlock:
+    """
+    A rendered `!enum` block.
+
+    Each enumerated value is rendered as a row, in it's own child
+    namespace. Rows are identified by the block `key` expression, or by
+    their index if none was given, and `update` only re-renders the rows
+    which were inserted, removed, or whose value changed.
+
+    When the enumerated object is touched, its values may have changed
+    in place: the rows which read their value statically are
+    re-rendered, the value variable of the others is touched, so their
+    bindings re-evaluate in place. Setting an item of an `ObservableList`
+    to itself does the same for that item's row only.
+
+    The index variable of a moved row is set in place, so bindings
+    reading it, like `pos:grid={{(0, idx)}}`, reconfigure themselves.
+    Only the rows which read it statically, like `pos:grid={(0, idx)}`
+    or an `!if` condition, are re-rendered when they move.
+
+    The block updates when one of the namespace variables read to get
+    the enumerated object is set. It subscribes itself, not a bound
+    method, so the namespace keeps it alive until `destroy` is called.
+    An enumerated `ObservableList` is not compared again when it
+    changes, it's changes are applied to the affected rows.
+    """
 
-    if name[0].islower():
-        if "." in name:
-            mod_path, name = name.rsplit(".", 1)
-            mod = import_module(builtin.__package__ + "." + mod_path)
+    Row = collections.namedtuple(
+        "Row", "key index value namespace made blocks uses_index uses_value"
+    )
+
+    def __init__(
+        self,
+        render: Callable,
+        parent,
+        namespace: Namespace,
+        obj: str,
+        alias: tuple[str, ...],
+        key: Optional[str] = None,
+    ):
+        """Render the rows of `namespace[obj]` with `render`."""
+        if key is not None and len(key) > 2 and key[0] + key[-1] == "{}":
+            key = key[1:-1]
+        self.render = render
+        self.parent = parent
+        self.namespace = namespace
+        self.obj = obj
+        self.alias = alias
+        self.key = None if key is None else compile_code(key)
+        self.order = []
+        self.enumerated = None
+        self.seen = None
+        self.applied = False
+        self.dependencies = set()
+        self._scope = Namespace([namespace])
+        self.update()
+
+    def variables(self, index: int, value) -> dict:
+        """Return the row variables of the enumerated value."""
+        if len(self.alias) > 1:
+            return {self.alias[0]: index, self.alias[1]: value}
+        else:
+            return {self.alias[0]: value}
+
+    def key_of(self, index: int, value):
+        """Compute the key of the enumerated value."""
+        if self.key is None:
+            return index
+        self._scope.vars = self.variables(index, value)
+        return eval(self.key, {}, self._scope)
+
+    def create(self, key, index: int, value) -> "EnumBlock.Row":
+        """Render the row of an enumerated value."""
+        namespace = Namespace([self.namespace])
+        namespace.vars.update(self.variables(index, value))
+        with track_reads() as reads:
+            made, blocks = self.render(self.parent, namespace)
+        uses_index = (namespace, self.alias[0]) in reads
+        if len(self.alias) == 1:
+            uses_index = False
+        uses_value = (namespace, self.alias[-1]) in reads
+        return EnumBlock.Row(
+            key, index, value, namespace, made, blocks, uses_index, uses_value
+        )
+
+    @staticmethod
+    def destroy_row(row: "EnumBlock.Row"):
+        """Destroy the nested blocks, then the components of a row."""
+        for block in row.blocks:
+            block.destroy()
+        for made in row.made:
+            made.destroy()
+
+    def _observe(self, enumerated):
+        """Listen to the changes of `enumerated` instead of the last one."""
+        if isinstance(self.enumerated, ObservableList):
+            self.enumerated.unlisten(self.apply)
+        self.enumerated = enumerated
+        self.seen = None
+        self.applied = False
+        if isinstance(enumerated, ObservableList):
+            enumerated.listen(self.apply)
+
+    def update(self, touched: bool = False):
+        """
+        Reconcile the rendered rows with the enumerated object, which
+        was `touched` if it's values may have changed in place.
+        """
+        with track_reads() as reads:
+            enumerated = self.namespace[self.obj]
+        self.dependencies = follow(self, self.dependencies, reads)
+        if enumerated is not self.enumerated:
+            self._observe(enumerated)
+            touched = False
+        elif touched:
+            self.seen = None
+        elif self.seen is not None and self.seen == enumerated.version:
+            return
+        values = {}
+        for index, value in enumerate(enumerated):
+            key = self.key_of(index, value)
+            if key in values:
+                raise ValueError(f"duplicate !enum key {key!r}", self.obj)
+            values[key] = (index, value)
+        rows = {row.key: row for row in self.order}
+        order = []
+        for key, (index, value) in values.items():
+            row = rows.pop(key, None)
+            if row is not None and (
+                (row.index != index and row.uses_index)
+                or not (row.value is value or row.value == value)
+            ):
+                self.destroy_row(row)
+                row = None
+            if row is not None and touched and row.value is value:
+                row = self._refresh(row)
+            if row is None:
+                row = self.create(key, index, value)
+            elif row.index != index or row.value is not value:
+                for name, var in self.variables(index, value).items():
+                    row.namespace[name] = var
+                row = row._replace(index=index, value=value)
+            order.append(row)
+        for row in rows.values():
+            self.destroy_row(row)
+        self.order = order
+        if isinstance(enumerated, ObservableList):
+            self.seen = enumerated.version
+
+    def _refresh(self, row: "EnumBlock.Row") -> "EnumBlock.Row":
+        """Update a row whose value may have changed in place."""
+        if row.uses_value:
+            self.destroy_row(row)
+            return self.create(row.key, row.index, row.value)
+        row.namespace.touch(self.alias[-1])
+        return row
+
+    def _insert(self, index: int, value, replace: bool = False):
+        """Render `value` at position `index`, or replace the row there."""
+        key = self.key_of(index, value)
+        if self.key is not None:
+            for position, row in enumerate(self.order):
+                if row.key == key and not (replace and position == index):
+                    raise ValueError(
+                        f"duplicate !enum key {key!r}", self.obj
+                    )
+        if replace:
+            self.destroy_row(self.order[index])
+            self.order[index] = self.create(key, index, value)
         else:
-            mod = builtin
-        if hasattr(mod, name):
-            _component = getattr(mod, name)
-            return _component
+            self.order.insert(index, self.create(key, index, value))
+
+    def _shift(self, start: int):
+        """Update the index of the rows from position `start`."""
+        for position in range(start, len(self.order)):
+            row = self.order[position]
+            if row.index == position:
+                continue
+            key = position if self.key is None else row.key
+            if row.uses_index:
+                self.destroy_row(row)
+                row = self.create(key, position, row.value)
+            else:
+                if len(self.alias) > 1:
+                    row.namespace[self.alias[0]] = position
+                row = row._replace(key=key, index=position)
+            self.order[position] = row
+
+    def apply(self, change: Change):
+        """Apply a change of the enumerated `ObservableList`."""
+        if change.kind == "insert":
+            self._insert(change.index, change.value)
+            self._shift(change.index + 1)
+        elif change.kind == "remove":
+            self.destroy_row(self.order.pop(change.index))
+            self._shift(change.index)
+        elif change.kind == "set":
+            row = self.order[change.index]
+            if row.value is change.value:
+                self.order[change.index] = self._refresh(row)
+            elif row.value == change.value:
+                for name, var in self.variables(
+                    change.index, change.value
+                ).items():
+                    row.namespace[name] = var
+                self.order[change.index] = row._replace(value=change.value)
+            else:
+                self._insert(change.index, change.value, replace=True)
+        elif change.kind == "move":
+            row = self.order.pop(change.index)
+            self.order.insert(change.target, row)
+            self._shift(min(change.index, change.target))
         else:
-            raise NameError(f"{name} not in module {mod}")
+            self.seen = None
+            self.update()
+            return
+        self.seen = self.enumerated.version
+        self.applied = True
+
+    def __call__(self):
+        """
+        Update the block, called by the followed namespaces when the
+        enumerated object was set, or touched if it is the same object
+        and the call doesn't forward a change already applied.
+        """
+        applied, self.applied = self.applied, False
+        self.update(touched=not applied)
+
+    def destroy(self):
+        """Destroy all the rows and stop following the namespace."""
+        self.dependencies = follow(self, self.dependencies, set())
+        self._observe(None)
+        for row in self.order:
+            self.destroy_row(row)
+        self.order = []
+
+
+def parse_tree(string: str) -> Optional[Template.Item]:
+    """Parse taktl source string into it's root `Template.Item`."""
+    return Tokenizer(string.replace("\\\n", "")).parse()
+
+
+def get_component(name, namespace=None):
+    """
+    Get the component class of tag `name`.
+
+    Lowercase names are resolved by `registry.COMPONENTS`, other names
+    are looked up in `namespace`.
+    """
+    from .registry import COMPONENTS
+
+    if name[0].islower():
+        return COMPONENTS.resolve(name)
     elif namespace is not None:
         return namespace[name]
     else:
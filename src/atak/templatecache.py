@@ -0,0 +1,191 @@
+"""
+Taktk on-disk cache of parsed templates.
+
+Parsed `Template.Item` trees are stored as marshalled tuples, keyed by a
+hash of the template source, the tree format and the atak version, so a
+warm start can skip the template parser entirely.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from . import Nil, __version__
+
+log = getLogger(__name__)
+
+SUFFIX = ".tkc"
+# bump when the parser output or the dumped tree layout changes
+TREE_VERSION = 2
+CACHE: "Optional[TemplateCache]" = None
+
+
+def default_path() -> Path:
+    """Return the default cache directory for the current user."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "atak" / "templates"
+
+
+class TemplateCache:
+    """Persistent cache of parsed template trees."""
+
+    path: Path
+    hits: int
+    misses: int
+    writes: int
+    errors: int
+
+    def __init__(self, path: "str | Path"):
+        """Create the cache storing it's entries in directory `path`."""
+        self.path = Path(path)
+        self.hits = self.misses = self.writes = self.errors = 0
+
+    @staticmethod
+    def key(source: str) -> str:
+        """Compute the cache key of template `source`."""
+        digest = hashlib.sha256()
+        digest.update(
+            f"{__version__}:{TREE_VERSION}:{marshal.version}\0".encode()
+        )
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def entry(self, source: str) -> Path:
+        """Return the path of the cache entry for `source`."""
+        return self.path / (self.key(source) + SUFFIX)
+
+    def get(self, source: str) -> Any:
+        """Return the cached tree for `source`, or `Nil` if not cached."""
+        try:
+            with open(self.entry(source), "rb") as f:
+                data = marshal.load(f)
+            root = load_item(data)
+        except FileNotFoundError:
+            self.misses += 1
+            return Nil
+        except OSError as e:
+            log.warning("could not read template cache entry: %s", e)
+            self.errors += 1
+            self.misses += 1
+            return Nil
+        except (EOFError, ValueError, TypeError) as e:
+            log.warning("dropping corrupted template cache entry: %s", e)
+            self.errors += 1
+            self.misses += 1
+            self.invalidate(source)
+            return Nil
+        self.hits += 1
+        return root
+
+    def put(self, source: str, root) -> None:
+        """Store the parsed tree `root` of template `source`."""
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                marshal.dump(dump_item(root), f)
+            os.replace(temp, self.entry(source))
+        except OSError as e:
+            log.warning("could not write template cache entry: %s", e)
+            self.errors += 1
+        else:
+            self.writes += 1
+
+    def lookup(self, source: str, parse: Callable):
+        """Return the tree for `source`, calling `parse` on cache miss."""
+        root = self.get(source)
+        if root is Nil:
+            root = parse(source)
+            self.put(source, root)
+        return root
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """
+        Remove the entry of `source`, or all the entries if not given.
+
+        Returns the number of removed entries.
+        """
+        if source is not None:
+            entries = [self.entry(source)]
+        elif self.path.is_dir():
+            entries = list(self.path.glob("*" + SUFFIX))
+        else:
+            entries = []
+        removed = 0
+        for entry in entries:
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache hit, miss, write and error counters."""
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            writes=self.writes,
+            errors=self.errors,
+        )
+
+    def __repr__(self) -> str:
+        """Reproduce the cache."""
+        return f"<TemplateCache {str(self.path)!r} {self.stats()}>"
+
+
+def dump_item(item) -> Optional[tuple]:
+    """Convert a `Template.Item` tree to marshallable tuples."""
+    if item is None:
+        return None
+    return (
+        item.type.value,
+        item.name,
+        item.args,
+        tuple(map(dump_item, item.children)),
+    )
+
+
+def load_item(data: Optional[tuple], parent=None):
+    """Rebuild a `Template.Item` tree dumped with `dump_item`."""
+    from .template import TagType, Template
+
+    if data is None:
+        return None
+    type_, name, args, children = data
+    item = Template.Item(
+        type=TagType(type_), name=name, args=args, parent=parent
+    )
+    item.children.extend(load_item(child, item) for child in children)
+    return item
+
+
+def enable(path: "str | Path | None" = None) -> TemplateCache:
+    """Install a template cache at `path` used by `Template.parse`."""
+    global CACHE
+    CACHE = TemplateCache(default_path() if path is None else path)
+    return CACHE
+
+
+def disable() -> None:
+    """Stop caching parsed templates."""
+    global CACHE
+    CACHE = None
@@ -0,0 +1,146 @@
+"""
+Taktk UI thread update channel.
+
+Tk may only be used from the thread running it's loop. Writeables set and
+callbacks called from other threads are queued here, and applied on the
+tk thread by a single `after()` pump, scheduled when the queue stops
+being empty. Only the latest value set to a Writeable is applied.
+
+Copyright (C) 2022  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import threading
+from tkinter import TclError
+from typing import Any, Callable, Optional
+
+INTERVAL = 15
+
+
+class UIChannel:
+    """Queue of updates handed to the tk thread."""
+
+    widget: Any
+    thread: Optional[int]
+    interval: int
+    pending: dict[Any, tuple[Callable, tuple]]
+    armed: bool
+    applied: int
+    coalesced: int
+
+    def __init__(self, interval: int = INTERVAL):
+        """
+        Create the channel, pumping `interval` milliseconds after the
+        first update is queued.
+        """
+        self.lock = threading.Lock()
+        self.widget = None
+        self.thread = None
+        self.interval = interval
+        self.pending = {}
+        self.armed = False
+        self.applied = self.coalesced = 0
+
+    def install(self, widget: Any):
+        """
+        Start pumping updates in the loop of `widget`.
+
+        Must be called from the tk thread, which becomes the UI thread.
+        """
+        self.widget = widget
+        self.thread = threading.get_ident()
+        with self.lock:
+            self.armed = True
+        widget.after(self.interval, self.pump)
+
+    def uninstall(self):
+        """Stop pumping, updates are applied in the calling thread again."""
+        self.widget = self.thread = None
+        self.drain()
+
+    def defers(self) -> bool:
+        """Return if updates from the current thread have to be queued."""
+        return self.thread is not None and threading.get_ident() != self.thread
+
+    def set(self, writeable: Any, value: Any):
+        """Set `writeable` to `value` on the UI thread."""
+        if not self.defers():
+            writeable.set(value)
+            return
+        with self.lock:
+            if self.pending.pop(writeable, None) is not None:
+                self.coalesced += 1
+            self.pending[writeable] = (writeable.set, (value,))
+        self.arm()
+
+    def call(self, callback: Callable, *args: Any):
+        """Call `callback` with `args` on the UI thread."""
+        if not self.defers():
+            callback(*args)
+            return
+        with self.lock:
+            self.pending[object()] = (callback, args)
+        self.arm()
+
+    def arm(self):
+        """Schedule a pump in the tk loop, unless one is scheduled."""
+        with self.lock:
+            widget = self.widget
+            if self.armed or widget is None:
+                return
+            self.armed = True
+        # outside of the lock, the tk thread may be draining
+        try:
+            widget.after(self.interval, self.pump)
+        except TclError:
+            self.widget = self.thread = None
+        except RuntimeError:
+            # the tk loop is not running, the next update arms again
+            with self.lock:
+                self.armed = False
+
+    def drain(self) -> int:
+        """Apply the queued updates, return their number."""
+        from .writeable import batch
+
+        with self.lock:
+            if not self.pending:
+                return 0
+            pending, self.pending = self.pending, {}
+        with batch():
+            for callback, args in pending.values():
+                callback(*args)
+        self.applied += len(pending)
+        return len(pending)
+
+    def pump(self):
+        """Drain the queue, updates queued from now on arm a new pump."""
+        with self.lock:
+            self.armed = False
+        if self.widget is not None:
+            self.drain()
+
+
+UI = UIChannel()
+
+
+def install(widget: Any) -> UIChannel:
+    """Pump the updates from other threads in the loop of `widget`."""
+    UI.install(widget)
+    return UI
+
+
+def call(callback: Callable, *args: Any):
+    """Call `callback` on the UI thread, see `UIChannel.call`."""
+    UI.call(callback, *args)
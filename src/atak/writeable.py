@@ -5,39 +5,326 @@ Composes of:
 
 - `Namespace`
 - `Writeable`
+- `Computed`
+- `Observable`
 - `Expression`
 - ...
 """
 import builtins
+import collections
+import heapq
+import itertools
+import operator
+import weakref
 from contextlib import contextmanager
-from functools import cached_property
+from functools import lru_cache
 from tkinter import IntVar, StringVar
+from types import CodeType, MethodType
 from typing import Any, Callable, Iterable, Optional
 
 from . import Nil
+from .uithread import UI
+
+BUILTINS = vars(builtins)
+
+
+@lru_cache(maxsize=4096)
+def compile_code(source: str, mode: str = "eval") -> CodeType:
+    """
+    Compile python `source` as `eval` or `exec` would, caching the code.
+
+    Like `eval`, leading spaces and tabs are stripped in eval mode.
+    """
+    if mode == "eval":
+        source = source.lstrip(" \t")
+    return compile(source, "<string>", mode)
+
+
+_TRACKING: list[set] = []
+EMPTY: frozenset = frozenset()
+
+
+@contextmanager
+def track_reads(propagate: bool = True):
+    """
+    Record the namespace variables and Writeables read in the context.
+
+    Yields a set of `(namespace, name)` pairs, and `(writeable, None)`
+    pairs, filled as they are read. Reads in nested contexts are also
+    recorded by the outer ones, unless `propagate` is False.
+    """
+    reads = set()
+    _TRACKING.append(reads)
+    try:
+        yield reads
+    finally:
+        _TRACKING.pop()
+        if propagate and _TRACKING:
+            _TRACKING[-1] |= reads
+
+
+def follow(callback: Callable, old: set, new: set) -> set:
+    """
+    Move the subscriptions of `callback` from reads `old` to reads `new`,
+    as recorded by `track_reads`, and return `new`.
+    """
+    for source, name in old - new:
+        if name is None:
+            if source._subscribers is not None:
+                source._subscribers.discard(callback)
+        else:
+            source.unsubscribe_key(name, callback)
+    for source, name in new - old:
+        if name is None:
+            source.subscribe(callback)
+        else:
+            source.subscribe_key(name, callback)
+    return new
+
+
+class Batch:
+    """
+    Notification batch state.
+
+    While a batch is open, notifications are collected instead of being
+    delivered, and each collected callback is called once when the
+    outermost batch closes. Notifications sent while flushing are
+    collected too, and delivered by the same flush.
+    """
+
+    depth: int
+    pending: dict[Callable, None]
+    idle: bool
+    flushing: bool
+
+    def __init__(self):
+        """Create the closed batch state."""
+        self.depth = 0
+        self.pending = {}
+        self.idle = False
+        self.flushing = False
+
+    def notify(self, callback: Callable):
+        """Call `callback`, or collect it if a batch is open."""
+        if self.depth > 0 or self.flushing:
+            self.pending[callback] = None
+        else:
+            self.call(callback)
+
+    def call(self, callback: Callable):
+        """Deliver a notification to `callback`."""
+        callback()
+
+    def open(self):
+        """Open a (nested) batch."""
+        self.depth += 1
+
+    def close(self):
+        """Close a batch, flushing notifications if it was the outermost."""
+        self.depth -= 1
+        if self.depth == 0 and not self.flushing:
+            self.flush()
+
+    def flush(self):
+        """Call the collected callbacks, in the order they were collected."""
+        self.flushing = True
+        try:
+            while self.pending:
+                callback = next(iter(self.pending))
+                del self.pending[callback]
+                self.call(callback)
+        finally:
+            self.flushing = False
+
+    def close_idle(self):
+        """Close the batch opened by `batch_idle`."""
+        self.idle = False
+        self.close()
+
+
+BATCH = Batch()
+
+
+@contextmanager
+def batch():
+    """
+    Deliver the notifications of the context once, when it exits.
+
+    Writeables and namespaces changed several times are checked once,
+    and each subscriber is called at most once.
+    """
+    BATCH.open()
+    try:
+        yield
+    finally:
+        BATCH.close()
+
+
+def batch_idle(widget):
+    """
+    Open a batch closed when the tk loop of `widget` is next idle.
+
+    Does nothing if such a batch is already open, so it can be called on
+    each change, e.g. from event handlers.
+    """
+    if not BATCH.idle:
+        BATCH.idle = True
+        BATCH.open()
+        widget.after_idle(BATCH.close_idle)
+
+
+class StrongRef:
+    """Reference-like wrapper holding a callable strongly."""
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback: Callable):
+        """Wrap `callback`."""
+        self.callback = callback
+
+    def __call__(self) -> Callable:
+        """Return the callable, like a dereferenced weak reference."""
+        return self.callback
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the wrapped callables."""
+        if not isinstance(other, StrongRef):
+            return NotImplemented
+        return self.callback == other.callback
+
+    def __hash__(self) -> int:
+        """Hash the wrapped callable."""
+        return hash(self.callback)
+
+
+def reference(
+    callback: Callable, on_death: Optional[Callable] = None
+) -> Callable:
+    """
+    Reference `callback` weakly if it is a bound method, else strongly.
+
+    Bound methods hence do not keep their object alive, and `on_death`
+    is called with the reference when the object is collected.
+    """
+    if isinstance(callback, MethodType):
+        return weakref.WeakMethod(callback, on_death)
+    else:
+        return StrongRef(callback)
+
+
+class Subscriptions:
+    """
+    A set of subscribed callbacks.
+
+    Bound methods are held by weak reference and removed when their
+    object is collected, other callables are held strongly. Up to `SMALL`
+    references are kept in a tuple, which costs far less than a set for
+    the usual one or two subscribers.
+    """
+
+    __slots__ = ("_refs",)
+    SMALL = 8
+    _refs: "tuple[Callable, ...] | set[Callable]"
+
+    def __init__(self):
+        """Create the empty set."""
+        self._refs = ()
+
+    def add(self, callback: Callable):
+        """Add `callback` to the set."""
+        ref = reference(callback, self._forget)
+        refs = self._refs
+        if isinstance(refs, tuple):
+            if ref in refs:
+                return
+            elif len(refs) < Subscriptions.SMALL:
+                self._refs = refs + (ref,)
+                return
+            refs = self._refs = set(refs)
+        refs.add(ref)
+
+    def _forget(self, ref: Callable):
+        """Drop the reference `ref` of a collected object."""
+        if isinstance(self._refs, tuple):
+            self._refs = tuple(r for r in self._refs if r is not ref)
+        else:
+            self._refs.discard(ref)
+
+    def remove(self, callback: Callable):
+        """Remove `callback`, raises KeyError if absent."""
+        ref = reference(callback)
+        if isinstance(self._refs, tuple):
+            if ref not in self._refs:
+                raise KeyError(callback)
+            self._refs = tuple(r for r in self._refs if r != ref)
+        else:
+            self._refs.remove(ref)
+
+    def discard(self, callback: Callable):
+        """Remove `callback` if present."""
+        try:
+            self.remove(callback)
+        except KeyError:
+            pass
+
+    def __iter__(self):
+        """Iterate over a snapshot of the living callbacks."""
+        for ref in tuple(self._refs):
+            if (callback := ref()) is not None:
+                yield callback
+
+    def __len__(self) -> int:
+        """Return the number of subscribed callbacks."""
+        return len(self._refs)
 
 
 class Subscribeable:
-    """Subscribeable value template."""
+    """
+    Subscribeable value template.
+
+    The subscriptions are allocated on first subscribe, values nobody
+    subscribes to hence only cost a slot.
+    """
 
-    _subscribers: set
+    __slots__ = ("_subscribers", "__weakref__")
+    _subscribers: Optional[Subscriptions]
 
     def __init__(self):
         """Create the subscibeable."""
-        self._subscribers = set()
+        self._subscribers = None
 
     def subscribe(self, subscriber: Callable):
-        """Subscribe to the subscibeable."""
+        """
+        Subscribe to the subscibeable.
+
+        Bound methods are referenced weakly, and unsubscribed when their
+        object is collected.
+        """
+        if self._subscribers is None:
+            self._subscribers = Subscriptions()
         self._subscribers.add(subscriber)
 
     def unsubscribe(self, subscriber: Callable):
         """Unsunscribe from the namespace."""
+        if self._subscribers is None:
+            raise KeyError(subscriber)
         self._subscribers.remove(subscriber)
 
     def warn_subscribers(self):
-        """Call all subscribed handlers."""
-        for subscriber in set(self._subscribers):
-            subscriber()
+        """
+        Call all subscribed handlers.
+
+        The handlers are collected before any is called, so computed
+        values are all marked stale before one is computed again.
+        """
+        if not self._subscribers:
+            return
+        BATCH.open()
+        try:
+            for subscriber in self._subscribers:
+                BATCH.notify(subscriber)
+        finally:
+            BATCH.close()
 
 
 class Subscriber:
@@ -79,78 +366,461 @@ class Subscriber:
 
     def __del__(self):
         """Delete properly the object."""
-        self.unsubscribe_from_all()
-        super().__del__()
+        if hasattr(self, "_subscribing"):
+            self.unsubscribe_from_all()
 
 
-class Namespace(Subscribeable):
-    """A parent or child namespace containing variables."""
+Change = collections.namedtuple(
+    "Change", "kind index value old target", defaults=(None,) * 4
+)
+Change.__doc__ = """
+An in-place change of an `Observable` collection.
+
+`kind` is one of:
+
+- `"insert"`: `value` was inserted at `index`.
+- `"remove"`: `old` was removed from `index`.
+- `"set"`: `index` was set from `old` (`Nil` if new) to `value`.
+- `"move"`: `value` was moved from `index` to `target`.
+- `"reset"`: the collection changed in any other way.
+"""
 
+
+class Observable(Subscribeable):
+    """
+    A collection emitting `Change` events when mutated in place.
+
+    Listeners receive each change as it happens, in order, while
+    subscribers are warned as for any Subscribeable. Reads of the
+    collection are tracked like namespace variables, and a namespace
+    holding the collection warns it's variable subscribers when it
+    changes.
+    """
+
+    __slots__ = ("version", "_listeners")
+    version: int
+    _listeners: Optional[Subscriptions]
+
+    def __init__(self):
+        """Create the observable."""
+        Subscribeable.__init__(self)
+        self.version = 0
+        self._listeners = None
+
+    def listen(self, listener: Callable[[Change], Any]):
+        """Call `listener` with each change, bound methods weakly."""
+        if self._listeners is None:
+            self._listeners = Subscriptions()
+        self._listeners.add(listener)
+
+    def unlisten(self, listener: Callable[[Change], Any]):
+        """Stop calling `listener`."""
+        if self._listeners is not None:
+            self._listeners.discard(listener)
+
+    def emit(self, *args: Any):
+        """Pass `Change(*args)` to the listeners and warn subscribers."""
+        self.version += 1
+        if self._listeners:
+            change = Change(*args)
+            for listener in self._listeners:
+                listener(change)
+        self.warn_subscribers()
+
+    def _read(self):
+        """Record a read of the collection."""
+        if _TRACKING:
+            _TRACKING[-1].add((self, None))
+
+
+class KeyForward:
+    """
+    Subscriber marking a namespace variable changed.
+
+    Subscribed to an `Observable` held by the variable, it references the
+    namespace weakly.
+    """
+
+    __slots__ = ("namespace", "item")
+
+    def __init__(self, namespace: "Namespace", item: str):
+        """Forward changes to variable `item` of `namespace`."""
+        self.namespace = weakref.ref(namespace)
+        self.item = item
+
+    def __call__(self):
+        """Mark the variable changed."""
+        namespace = self.namespace()
+        if namespace is not None:
+            namespace._changed(self.item)
+            namespace.watch_changes()
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the namespace and variable."""
+        if not isinstance(other, KeyForward):
+            return NotImplemented
+        return self.namespace == other.namespace and self.item == other.item
+
+    def __hash__(self) -> int:
+        """Hash the namespace and variable."""
+        return hash((self.namespace, self.item))
+
+
+class Namespace(Subscribeable):
+    """
+    A parent or child namespace containing variables.
+
+    Changes are counted by `version`, and subscribers can read the names
+    of the variables which changed in `changed` when they are warned.
+
+    Variables found in parents are cached with the namespaces visited to
+    find them, the cache entries of a name are dropped in all the
+    descendant namespaces when that name is added to a namespace.
+    `parents` should hence not change after creation.
+    """
+
+    __slots__ = (
+        "parents",
+        "vars",
+        "version",
+        "changed",
+        "_dirty",
+        "_key_subscribers",
+        "_lookup",
+        "_children",
+        "_journal",
+    )
     parents: "Iterable[Namespace]"
     vars: dict[str]
-    _last: dict[str]
+    version: int
+    changed: frozenset[str]
+    _dirty: "set[str] | frozenset[str]"
+    _key_subscribers: dict[str, Subscriptions]
+    _lookup: "dict[str, tuple[Optional[Namespace], tuple[Namespace, ...]]]"
+    _children: "Optional[weakref.WeakSet[Namespace]]"
+    _journal: "Optional[list[tuple[Snapshot, dict[str, Any]]]]"
 
     def __init__(self, parents: "Iterable[Namespace]" = []):
         """Create the namespace with the specified parents."""
         self.parents = parents
         self.vars = {}
-        self._last = {}
+        self.version = 0
+        self.changed = EMPTY
+        self._dirty = EMPTY
+        self._key_subscribers = {}
+        self._lookup = {}
+        self._children = None
+        self._journal = None
+        for parent in parents:
+            if parent._children is None:
+                parent._children = weakref.WeakSet()
+            parent._children.add(self)
         Subscribeable.__init__(self)
 
     def __getitem__(self, item: str) -> Any:
         """Get namespace variable from self or parents."""
-        self.watch_changes()
         if item in self.vars:
+            if _TRACKING:
+                _TRACKING[-1].add((self, item))
             return self.vars[item]
-        else:
-            for parent in self.parents:
-                try:
-                    return parent[item]
-                except NameError:
-                    continue
-            else:
-                if item in dir(builtins):
-                    return getattr(builtins, item)
-                else:
-                    raise NameError(item)
+        entry = self._lookup.get(item)
+        if entry is not None:
+            owner, path = entry
+            scope = BUILTINS if owner is None else owner.vars
+        if entry is None or item not in scope:
+            try:
+                owner, path = self._lookup[item] = self._resolve(item)
+            except NameError:
+                if _TRACKING:
+                    _TRACKING[-1].add((self, item))
+                raise
+            scope = BUILTINS if owner is None else owner.vars
+        if _TRACKING:
+            _TRACKING[-1].update((namespace, item) for namespace in path)
+        return scope[item]
+
+    def _resolve(
+        self, item: str
+    ) -> "tuple[Optional[Namespace], tuple[Namespace, ...]]":
+        """
+        Find the parent namespace defining `item`, None for builtins.
+
+        Returns it with the namespaces visited to find it.
+        """
+        path = [self]
+        stack = list(reversed(self.parents))
+        while stack:
+            namespace = stack.pop()
+            path.append(namespace)
+            if item in namespace.vars:
+                return namespace, tuple(path)
+            stack.extend(reversed(namespace.parents))
+        if item in BUILTINS:
+            return None, tuple(path)
+        raise NameError(item)
+
+    def _invalidate(self, item: str):
+        """Drop the cached lookups of `item` in descendant namespaces."""
+        stack = [self]
+        while stack:
+            namespace = stack.pop()
+            namespace._lookup.pop(item, None)
+            if namespace._children is not None:
+                stack.extend(namespace._children)
 
     def __setitem__(self, item: str, value: Any):
         """Set namespace variable value."""
-        self.vars[item] = value
+        self._assign(item, value)
+        self.watch_changes()
+
+    def __delitem__(self, item: str):
+        """Remove variable `item` of the namespace."""
+        if item not in self.vars:
+            raise KeyError(item)
+        self._assign(item, Nil)
         self.watch_changes()
 
+    def _assign(self, item: str, value: Any):
+        """Record the old value of `item` for snapshots, and set it."""
+        if self._journal is not None:
+            entry = self._journal[-1][1]
+            if item not in entry:
+                entry[item] = self.vars.get(item, Nil)
+        self._write(item, value)
+
+    def _write(self, item: str, value: Any):
+        """Set or, if `value` is `Nil`, remove variable `item`."""
+        old = self.vars.get(item, Nil)
+        if value is Nil:
+            if old is Nil:
+                return
+            del self.vars[item]
+            self._invalidate(item)
+        else:
+            self.vars[item] = value
+            if old is Nil:
+                self._invalidate(item)
+        if old is not value:
+            if isinstance(old, Observable):
+                try:
+                    old.unsubscribe(KeyForward(self, item))
+                except KeyError:
+                    pass
+            if isinstance(value, Observable):
+                value.subscribe(KeyForward(self, item))
+        if old is Nil or value is Nil or not (old is value or old == value):
+            self._changed(item)
+
+    def touch(self, *items: str):
+        """
+        Mark variables `items` as changed and warn their key subscribers.
+
+        Use it after mutating `vars` or a variable value in place, then
+        call `watch_changes` to warn the namespace subscribers.
+        """
+        for item in items:
+            self._invalidate(item)
+        self._changed(*items)
+
+    def _changed(self, *items: str):
+        """Count the change of `items` and warn their key subscribers."""
+        self.version += 1
+        if self._dirty is EMPTY:
+            self._dirty = set(items)
+        else:
+            self._dirty.update(items)
+        for item in items:
+            self.warn_key_subscribers(item)
+
+    def subscribe_key(self, item: str, subscriber: Callable):
+        """Subscribe to changes of variable `item` only."""
+        if item not in self._key_subscribers:
+            self._key_subscribers[item] = Subscriptions()
+        self._key_subscribers[item].add(subscriber)
+
+    def unsubscribe_key(self, item: str, subscriber: Callable):
+        """Unsubscribe from changes of variable `item`."""
+        subscribers = self._key_subscribers.get(item)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._key_subscribers[item]
+
+    def warn_key_subscribers(self, item: str):
+        """Call the handlers subscribed to variable `item`."""
+        subscribers = self._key_subscribers.get(item)
+        if subscribers is not None:
+            BATCH.open()
+            try:
+                for subscriber in subscribers:
+                    BATCH.notify(subscriber)
+            finally:
+                BATCH.close()
+            current = self._key_subscribers.get(item)
+            if current is subscribers and not subscribers:
+                del self._key_subscribers[item]
+
     def __repr__(self) -> str:
         """Reproduce the namespace variables."""
         return repr(self.vars)
 
-    def watch_changes(self):
-        """Warn subscribers if change noticed."""
-        if self.vars != self._last:
-            self._last = self.vars.copy()
-            self.warn_subscribers()
+    def watch_changes(self) -> bool:
+        """
+        Warn subscribers if variables changed since the last call.
+
+        Returns if change was noticed, in a batch the check is deferred
+        to it's end.
+        """
+        if BATCH.depth > 0:
+            BATCH.notify(self.watch_changes)
+            return False
+        if not self._dirty:
+            return False
+        self.changed = frozenset(self._dirty)
+        self._dirty = EMPTY
+        self.warn_subscribers()
+        return True
+
+    def snapshot(self) -> "Snapshot":
+        """
+        Take a snapshot of the variables, to `restore` or `release` later.
+
+        Nothing is copied: until the snapshot is released, the first old
+        value of each variable set is recorded, and restoring only sets
+        these variables back. Snapshots nest.
+        """
+        if self._journal is None:
+            self._journal = []
+        snapshot = Snapshot(self, len(self._journal) + 1)
+        self._journal.append((snapshot, {}))
+        return snapshot
+
+    def _levels(self, snapshot: "Snapshot") -> list[tuple]:
+        """Remove and return the journal levels from `snapshot` on."""
+        index = snapshot.depth - 1
+        if (
+            snapshot.namespace is not self
+            or self._journal is None
+            or len(self._journal) <= index
+            or self._journal[index][0] is not snapshot
+        ):
+            raise ValueError("snapshot was already restored or released")
+        levels = self._journal[index:]
+        del self._journal[index:]
+        if not self._journal:
+            self._journal = None
+        return levels
+
+    def restore(self, snapshot: "Snapshot"):
+        """
+        Set the variables back to their value at `snapshot`.
+
+        Snapshots taken after it are dropped, the subscribers of the
+        restored variables are warned once.
+        """
+        levels = self._levels(snapshot)
+        with batch():
+            for _, entry in reversed(levels):
+                for item, old in entry.items():
+                    self._write(item, old)
+            self.watch_changes()
+
+    def release(self, snapshot: "Snapshot"):
+        """
+        Keep the changes made since `snapshot`, and drop it with the
+        snapshots taken after it.
+        """
+        levels = self._levels(snapshot)
+        if self._journal is not None:
+            parent = self._journal[-1][1]
+            for _, entry in levels:
+                for item, old in entry.items():
+                    parent.setdefault(item, old)
 
     @contextmanager
     def save_var(self, varname: str):
-        """Context manager to save variable value and restore(only if set!)."""
+        """
+        Context manager restoring variable `varname` on exit.
+
+        The variable is removed again if it was not set in the namespace.
+        """
+        old = self.vars.get(varname, Nil)
         try:
-            value = self[varname]
-        except NameError:
-            yield
-        else:
             yield
-            self[varname] = value
+        finally:
+            self._assign(varname, old)
+            self.watch_changes()
 
     @contextmanager
     def save(self):
-        """Context manager to save variable value and restore(only if set!)."""
-        var = self.vars.copy()
-        yield
-        self.vars.clear()
-        self.vars(var)
+        """Context manager restoring all the variables on exit."""
+        snapshot = self.snapshot()
+        try:
+            yield snapshot
+        finally:
+            self.restore(snapshot)
+
+
+class Snapshot:
+    """A state a `Namespace` can be restored to, see `Namespace.snapshot`."""
+
+    __slots__ = ("namespace", "depth")
+
+    def __init__(self, namespace: Namespace, depth: int):
+        """Create the snapshot of `namespace` at journal `depth`."""
+        self.namespace = namespace
+        self.depth = depth
+
+    def restore(self):
+        """Restore the namespace to the snapshot."""
+        self.namespace.restore(self)
+
+    def release(self):
+        """Keep the changes made since the snapshot."""
+        self.namespace.release(self)
+
+
+COMPARATORS: dict[str, Optional[Callable[[Any, Any], bool]]] = {
+    "equality": operator.ne,
+    "identity": operator.is_not,
+    "version": None,
+}
 
 
 class Writeable(Subscribeable):
-    """Create a Writeable with subscribers and methods."""
+    """
+    Create a Writeable with subscribers and methods.
+
+    Writeables are slotted, as forms create thousands of them, and the
+    tkinter variables bound to them are created on first access.
+
+    `compare` decides if the value changed since subscribers were last
+    warned:
+
+    - `"equality"`: the values are compared with `!=`, the default.
+    - `"identity"`: only a different object is a change, which is cheap
+      for large collections.
+    - `"version"`: only a change of `version`, increased on `set`,
+      `touch` and when a variable read by the getter changes, the value
+      is not even read.
+    - a callable `compare(old, new)` returning if the value changed.
+
+    In-place mutations are signalled with `touch`.
+    """
+
+    __slots__ = (
+        "_value",
+        "last",
+        "getter",
+        "setter",
+        "dependencies",
+        "compare",
+        "version",
+        "_tkvars",
+    )
+    compare: Optional[Callable[[Any, Any], bool]]
+    version: int
+    _tkvars: Optional[dict[type, "WritableVar"]]
 
     @classmethod
     def from_get_set(
@@ -161,11 +831,14 @@ class Writeable(Subscribeable):
         value: Any = None,
         getter_caller: str = "returns",
         set_name: str = "value",
+        compare: "str | Callable[[Any, Any], bool]" = "equality",
     ) -> "Writeable":
         """Create a writeable only using get and set strings."""
+        is_call = len(getter) > 0 and getter[-1] == ";"
+        get_code = compile_code(getter, "exec" if is_call else "eval")
 
         def eval_gets():
-            return eval(getter, {}, namespace)
+            return eval(get_code, {}, namespace)
 
         def call_gets():
             response = None
@@ -174,24 +847,29 @@ class Writeable(Subscribeable):
                 nonlocal response
                 response = val
 
-            exec(getter, {getter_caller: set_response}, namespace)
+            exec(get_code, {getter_caller: set_response}, namespace)
             return response
 
         def call_sets(val):
             with namespace.save_var(set_name):
                 namespace[set_name] = val
-                exec(setter, {}, namespace)
+                exec(compile_code(setter, "exec"), {}, namespace)
 
         return cls(
             value,
-            call_gets
-            if (len(getter) > 0 and getter[-1] == ";")
-            else eval_gets,
+            call_gets if is_call else eval_gets,
             call_sets,
+            compare,
         )
 
     @classmethod
-    def from_name(cls, namespace: Namespace, name: str, value: Any = None):
+    def from_name(
+        cls,
+        namespace: Namespace,
+        name: str,
+        value: Any = None,
+        compare: "str | Callable[[Any, Any], bool]" = "equality",
+    ):
         """Create a writeable object from namespace and name binding."""
 
         def getter():
@@ -200,63 +878,245 @@ class Writeable(Subscribeable):
         def setter(val):
             namespace[name] = val
 
-        return cls(value, getter, setter)
+        return cls(value, getter, setter, compare)
 
     def __init__(
         self,
         val: Any = None,
         getter: Optional[Callable] = None,
         setter: Optional[Callable] = None,
+        compare: "str | Callable[[Any, Any], bool]" = "equality",
     ):
         """Create the object with the specified default value."""
+        if isinstance(compare, str):
+            try:
+                compare = COMPARATORS[compare]
+            except KeyError:
+                raise ValueError(f"unknown comparison {compare!r}") from None
         self._value = val
-        self.last = val
-        self.subscribers = set()
+        self.compare = compare
+        self.version = 0
+        self.last = 0 if compare is None else val
         self.getter = getter
         self.setter = setter
+        self.dependencies = EMPTY
+        self._tkvars = None
         Subscribeable.__init__(self)
 
     def set(self, value: Any):
-        """Set the value of the Writeable, and watches changes."""
+        """
+        Set the value of the Writeable, and watches changes.
+
+        From another thread than the UI one, the value is handed to the
+        UI thread, see `uithread`.
+        """
+        if UI.defers():
+            UI.set(self, value)
+            return
         if self.setter is not None:
+            version = self.version
             self.setter(value)
+            if self.version != version:
+                # the setter wrote a variable read by the getter, which
+                # already counted and warned the change
+                return
         else:
             self._value = value
+        self.version += 1
+        self.watch_changes()
+
+    def touch(self):
+        """
+        Signal the value changed in place.
+
+        Subscribers are warned whatever the comparison says.
+        """
+        if UI.defers():
+            UI.call(self.touch)
+            return
+        self.version += 1
+        if self.compare is not None:
+            self.last = Nil
+        self.watch_changes()
+
+    def _observe(self) -> Any:
+        """Return what `last` records: the value, or it's version."""
+        return self.version if self.compare is None else self.get()
+
+    def _reads_changed(self):
+        """Handle the change of a variable read by the getter."""
+        self.version += 1
         self.watch_changes()
 
     def watch_changes(self) -> bool:
         """
         Check if value changed and notify subscribers.
 
-        Returns if change was noticed
+        Returns if change was noticed, in a batch the check is deferred
+        to it's end.
         """
-        if self.last != (val := self.get()):
+        if BATCH.depth > 0:
+            BATCH.notify(self.watch_changes)
+            return False
+        if self.compare is None:
+            if self.last == self.version:
+                return False
+            self.last = self.version
+        else:
+            val = self.get()
+            if self.last is not Nil and not self.compare(self.last, val):
+                return False
             self.last = val
-            self.warn_subscribers()
-            return True
-        return False
+        self.warn_subscribers()
+        return True
 
     def get(self):
-        """Return the value of the variable."""
+        """
+        Return the value of the variable.
+
+        The namespace variables and Writeables read by the getter are
+        followed, so the Writeable watches changes when one of them is set.
+        Outer `track_reads` contexts record the Writeable, not its reads.
+        """
+        if _TRACKING:
+            _TRACKING[-1].add((self, None))
         if self.getter is not None:
-            return self.getter()
+            with track_reads(propagate=False) as reads:
+                value = self.getter()
+            self.dependencies = follow(
+                self._reads_changed, self.dependencies, reads
+            )
+            return value
         else:
             return self._value
 
-    @cached_property
+    def _tkvar(self, cls: type) -> "WritableVar":
+        """Return the variable of type `cls` bound to the Writeable."""
+        if self._tkvars is None:
+            self._tkvars = {}
+        try:
+            return self._tkvars[cls]
+        except KeyError:
+            var = self._tkvars[cls] = cls(self)
+            return var
+
+    @property
     def intvar(self):
         """Create a `tkinter.IntVar` for Writeable."""
-        return WritableIntVar(self)
+        return self._tkvar(WritableIntVar)
 
-    @cached_property
+    @property
     def stringvar(self):
         """Create a `tkinter.StringVar` for Writeable."""
-        return WritableStringVar(self)
+        return self._tkvar(WritableStringVar)
 
-    @cached_property
+    @property
     def booleanvar(self):
         """Create a `tkinter.BooleanVar` for Writeable."""
-        return WritableBoolVar(self)
+        return self._tkvar(WritableBoolVar)
+
+
+class Computed(Writeable):
+    """
+    Writeable memoizing a value computed from other Writeables.
+
+    `compute` is called only when the value is read after one of the
+    Writeables or namespace variables it read changed. Changes propagate
+    in topological order, after all the dependent values were marked
+    stale, so each value is computed once per change and subscribers never
+    see a half updated graph.
+    """
+
+    __slots__ = ("compute", "stale", "level", "upstream", "dependents")
+    _queue: list[tuple[int, int, "Computed"]] = []
+    _order = itertools.count()
+
+    def __init__(
+        self,
+        compute: Callable,
+        setter: Optional[Callable] = None,
+        compare: "str | Callable[[Any, Any], bool]" = "equality",
+    ):
+        """Create the value computed by `compute`, and it's `setter`."""
+        Writeable.__init__(self, None, None, setter, compare)
+        self.compute = compute
+        self.stale = True
+        self.level = 0
+        self.upstream = set()
+        self.dependents = weakref.WeakSet()
+
+    def set(self, value: Any):
+        """Set the value using the setter."""
+        if self.setter is None:
+            raise AttributeError("Computed value has no setter")
+        if UI.defers():
+            UI.set(self, value)
+            return
+        self.setter(value)
+
+    def subscribe(self, subscriber: Callable):
+        """Subscribe to the value, computing it to follow it's sources."""
+        Writeable.subscribe(self, subscriber)
+        if self.stale:
+            self.refresh()
+            self.last = self._observe()
+
+    def get(self):
+        """Return the value, computing it again if stale."""
+        if _TRACKING:
+            _TRACKING[-1].add((self, None))
+        if self.stale:
+            self.refresh()
+        return self._value
+
+    def refresh(self):
+        """Compute the value and follow what `compute` reads."""
+        with track_reads(propagate=False) as reads:
+            value = self.compute()
+        sources = set()
+        upstream = set()
+        for source, name in reads:
+            if isinstance(source, Computed):
+                upstream.add(source)
+            else:
+                sources.add((source, name))
+        self.dependencies = follow(
+            self.invalidate, self.dependencies, sources
+        )
+        for computed in self.upstream - upstream:
+            computed.dependents.discard(self)
+        for computed in upstream:
+            computed.dependents.add(self)
+        self.upstream = upstream
+        self.level = 1 + max((c.level for c in upstream), default=0)
+        self._value = value
+        self.version += 1
+        self.stale = False
+
+    def invalidate(self):
+        """Mark the value and the values depending on it stale."""
+        stack = [self]
+        while stack:
+            computed = stack.pop()
+            if computed.stale:
+                continue
+            computed.stale = True
+            heapq.heappush(
+                Computed._queue,
+                (computed.level, next(Computed._order), computed),
+            )
+            stack.extend(computed.dependents)
+        BATCH.notify(Computed.propagate)
+
+    @staticmethod
+    def propagate():
+        """Recompute the stale values subscribed to, lowest level first."""
+        queue = Computed._queue
+        while queue:
+            _, _, computed = heapq.heappop(queue)
+            if computed.stale and computed._subscribers:
+                computed.refresh()
+                computed.watch_changes()
 
 
 class WritableVar(Subscribeable, Subscriber):
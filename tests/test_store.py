@@ -0,0 +1,169 @@
+"""
+Round trips of the `Store` backends through their files: writes,
+defaults, tuple paths, partitions, transactions, write-behind, reloads,
+and the recovery of a torn journal.
+"""
+import os
+
+import pytest
+
+from atak.store import JournalStore, SQLiteStore, Store
+
+BACKENDS = [Store, SQLiteStore, JournalStore]
+DEFAULT = {"settings": {"theme": "light", "font": "mono"}}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "store")
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_reopen(cls, path):
+    store = cls(path)
+    store["a"] = 1
+    store["b"] = {"c": [1, 2]}
+    store["a"] = 2
+    assert cls(path) == {"a": 2, "b": {"c": [1, 2]}}
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_defaults(cls, path):
+    cls(path, DEFAULT)
+    assert cls(path) == DEFAULT
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_reopen_path_under_default(cls, path):
+    store = cls(path, DEFAULT)
+    store[("settings", "theme")] = "dark"
+    store["other"] = 1
+    reopened = cls(path, DEFAULT)
+    assert reopened == {
+        "settings": {"theme": "dark", "font": "mono"},
+        "other": 1,
+    }
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_nested_path(cls, path):
+    store = cls(path, {"a": {"b": {"c": 1}}})
+    store[("a", "b", "c")] = 2
+    store[("a", "d")] = 3
+    assert store[("a", "b", "c")] == 2
+    assert cls(path) == {"a": {"b": {"c": 2}, "d": 3}}
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_partition(cls, path):
+    store = cls(path)
+    store.partition("user", {"name": "bob"})["todos"] = ["x"]
+    store.for_page("home").partition("bob")["seen"] = True
+    reopened = cls(path)
+    assert reopened.partition("user") == {"name": "bob", "todos": ["x"]}
+    assert reopened.for_page("home").partition("bob") == {"seen": True}
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_save_in_place(cls, path):
+    store = cls(path, {"todos": []})
+    store["n"] = 1
+    store["todos"].append("x")
+    store.save()
+    assert cls(path)["todos"] == ["x"]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_transaction(cls, path):
+    store = cls(path, {"a": 0})
+    flushes = store.flushes
+    with store.transaction():
+        store["a"] = 1
+        store.partition("p")["x"] = 1
+        store["a"] = 2
+    assert store.flushes == flushes + 1
+    assert cls(path)["a"] == 2
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_rollback(cls, path):
+    store = cls(path, {"a": 0})
+    partition = store.partition("p", {"x": 0})
+    with pytest.raises(KeyError):
+        with store.transaction():
+            store["a"] = 1
+            partition["x"] = 1
+            store["b"] = 1
+            raise KeyError("abort")
+    assert store["a"] == 0 and "b" not in store
+    assert partition == {"x": 0}
+    store["c"] = 1
+    reopened = cls(path)
+    assert reopened["a"] == 0 and "b" not in reopened
+    assert reopened.partition("p") == {"x": 0}
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_write_behind(cls, path):
+    store = cls(path, write_behind=True, delay=60)
+    store.flush()
+    store["a"] = 1
+    assert "a" not in cls(path)
+    store.close()
+    assert cls(path) == {"a": 1}
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_reload(cls, path):
+    reader = cls(path, check_interval=None)
+    writer = cls(path)
+    writer["a"] = 1
+    assert "a" not in reader
+    reloads = reader.stats()["reloads"]
+    reader.invalidate()
+    assert reader["a"] == 1
+    assert reader.stats()["reloads"] == reloads + 1
+
+
+def test_corrupt_file_is_kept(path):
+    with open(path, "w") as f:
+        f.write("{oops")
+    with pytest.raises(ValueError):
+        Store(path)
+    with open(path) as f:
+        assert f.read() == "{oops"
+
+
+def test_torn_journal_tail(path):
+    store = JournalStore(path)
+    store["a"] = 1
+    store["b"] = 2
+    with open(store.journal, "ab") as f:
+        f.write(b'[["c"], 3')
+    reopened = JournalStore(path)
+    assert reopened == {"a": 1, "b": 2}
+    with open(store.journal, "rb") as f:
+        assert f.read().endswith(b'[["c"], 3')
+    reopened["c"] = 4
+    assert JournalStore(path) == {"a": 1, "b": 2, "c": 4}
+    assert reopened.compact()
+    assert JournalStore(path) == {"a": 1, "b": 2, "c": 4}
+
+
+def test_journal_compaction(path):
+    store = JournalStore(path, DEFAULT)
+    store[("settings", "theme")] = "dark"
+    store["n"] = 1
+    assert store.compact()
+    assert not os.path.exists(store.journal)
+    store["n"] = 2
+    assert JournalStore(path) == {
+        "settings": {"theme": "dark", "font": "mono"},
+        "n": 2,
+    }
+
+
+@pytest.mark.parametrize("serializer", ["marshal", "pickle"])
+def test_journal_serializer(path, serializer):
+    with pytest.raises(ValueError):
+        JournalStore(path, serializer=serializer)
@@ -0,0 +1,135 @@
+"""
+Parity of the `Tokenizer` template parser with the reference `State`
+parser, on the example templates, special instructions and a seeded
+random corpus.
+"""
+import ast
+import random
+from pathlib import Path
+
+import pytest
+
+from atak.template import State, Tokenizer
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+TEMPLATES = [
+    "\\frame",
+    "\\frame:root padding=20 disabled",
+    "\\frame   # trailing comment\n  # full line comment\n  \\label\n",
+    '\\label text="a \\" b" img=img:@icon{width: 20; height:30}',
+    "\\label x=1.5 y=0:2 z=/a/b/ t=[pages.title]",
+    '\\Custom.thing:al a={ [1, (2, 3)] } b="x\ny"',
+    "\\x a=img:foo{ 'x y' }  b\n   \\y  c={ \"}\" }\n  \\z d=(1,\n 2)\n",
+    "\\entry bind:Key-Return={add} pos:grid=0,0",
+    "\\frame\n  \\label \\\n      text='continued' \\\n      pos:grid=0,0\n",
+    "\n\n# only comments\n",
+    "\\a\n  \\b\n    \\c\n      \\d\n  \\e\n",
+    "\\frame\n  !enum todos:(idx, todo)\n    \\label text={todo}\n",
+    "\\frame\n  !enum todos:(todo)\n    \\label text={todo}\n",
+    "\\frame\n  !enum todos:(i, t) key={t.uuid}\n    \\label\n",
+    "\\frame\n  !enum a:(y, row)\n    !enum row:(x, cell)\n      \\label\n",
+    "\\frame\n  !if user is not None\n    \\label text={user.name}\n",
+    "\\frame\n  !if a\n    !if b  \n      \\label\n  \\button\n",
+]
+
+INVALID = [
+    "\\x @",
+    "\\x a={1]",
+    "\\x a='open",
+    "\\frame\n  !enum todos\n",
+    "\\frame\n  !enum todos:(a, b, c)\n",
+    "\\frame\n  !unknown x\n",
+    "label",
+]
+
+PIECES = [
+    "\\frame",
+    "\\label:x",
+    "!if x > 1",
+    "!enum items:(i, v)",
+    " ",
+    "  ",
+    "\n",
+    "\n  ",
+    "\n    ",
+    "a=1",
+    'b="s p"',
+    "c='q'",
+    "d={x + (1)}",
+    "e=img:a{w: 1}",
+    "f",
+    "# c",
+    "g=[t.x]",
+    "h=1,2",
+    "bind:Key-Return={k}",
+]
+
+
+def example_templates():
+    """Yield the component templates of the examples."""
+    for path in sorted(EXAMPLES.rglob("*.py")):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if not isinstance(node, ast.ClassDef):
+                continue
+            doc = ast.get_docstring(node, clean=False)
+            if doc is not None and doc.lstrip().startswith("\\"):
+                name = f"{path.relative_to(EXAMPLES)}:{node.name}"
+                yield pytest.param(doc, id=name)
+
+
+def random_templates(count: int, seed: int = 1):
+    """Yield `count` random combinations of template pieces."""
+    rand = random.Random(seed)
+    for _ in range(count):
+        pieces = rand.choices(PIECES, k=rand.randint(0, 12))
+        yield "\\root" + "".join(pieces)
+
+
+def parse(parser: type, text: str):
+    """Return the repr of the tree parsed from `text`, or the error type."""
+    try:
+        return repr(parser(text).parse())
+    except Exception as e:
+        return type(e)
+
+
+def assert_parity(text: str):
+    """Assert both parsers give the same tree, or both fail."""
+    assert parse(State, text) == parse(Tokenizer, text)
+
+
+@pytest.mark.parametrize("text", TEMPLATES)
+def test_templates(text):
+    assert_parity(text)
+    assert not isinstance(parse(Tokenizer, text), type)
+
+
+@pytest.mark.parametrize("text", list(example_templates()))
+def test_examples(text):
+    assert_parity(text)
+
+
+@pytest.mark.parametrize("text", INVALID)
+def test_invalid(text):
+    with pytest.raises(Exception):
+        State(text).parse()
+    with pytest.raises(Exception):
+        Tokenizer(text).parse()
+
+
+def test_random_corpus():
+    for text in random_templates(5000):
+        assert_parity(text)
+
+
+def test_tree_links():
+    text = TEMPLATES[-2]
+    root = Tokenizer(text).parse()
+    assert repr(root) == repr(State(text).parse())
+    items = [root]
+    while items:
+        item = items.pop()
+        for child in item.children:
+            assert child.parent is item
+        items.extend(item.children)